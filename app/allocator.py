@@ -0,0 +1,188 @@
+import hashlib
+import random
+import string
+import threading
+from functools import lru_cache
+from typing import List, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from .config import get_settings
+from .database import SessionLocal
+from .models import ShortCodeCounter
+
+settings = get_settings()
+
+ALPHABET = string.digits + string.ascii_letters
+
+
+def encode_base62(value: int, length: int) -> str:
+    """Encode a non-negative integer as a fixed-width base62 string."""
+    chars = []
+    for _ in range(length):
+        value, remainder = divmod(value, 62)
+        chars.append(ALPHABET[remainder])
+    if value:
+        raise ValueError("Value does not fit in the requested length")
+    return ''.join(reversed(chars))
+
+
+class FeistelPermutation:
+    """
+    Keyed bijection on [0, domain) built from a balanced Feistel network.
+
+    The network permutes the smallest even-width bit space that covers the
+    domain; values that land outside it are walked through the network
+    again until they fall back inside, which keeps the mapping bijective.
+    """
+
+    def __init__(self, domain: int, key: bytes, rounds: int = 4):
+        bits = max(2, (domain - 1).bit_length())
+        bits += bits % 2
+        self.domain = domain
+        self.half = bits // 2
+        self.mask = (1 << self.half) - 1
+        self.round_keys = [hashlib.sha256(key + bytes([i])).digest()[:16] for i in range(rounds)]
+
+    def _round(self, value: int, round_key: bytes) -> int:
+        digest = hashlib.blake2b(value.to_bytes(8, 'big'), key=round_key, digest_size=8).digest()
+        return int.from_bytes(digest, 'big') & self.mask
+
+    def permute(self, value: int) -> int:
+        while True:
+            left, right = value >> self.half, value & self.mask
+            for round_key in self.round_keys:
+                left, right = right, left ^ self._round(right, round_key)
+            value = (left << self.half) | right
+            if value < self.domain:
+                return value
+
+
+class DatabaseCounter:
+    """Leases id blocks from a row in the short_code_counters table."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def lease(self, size: int) -> int:
+        """Reserve `size` ids and return the first one."""
+        db = SessionLocal()
+        try:
+            while True:
+                # The UPDATE holds the row lock until commit, so the SELECT sees our own block end
+                updated = db.query(ShortCodeCounter).filter(ShortCodeCounter.name == self.name).update(
+                    {ShortCodeCounter.value: ShortCodeCounter.value + size}, synchronize_session=False
+                )
+                if updated:
+                    end = db.query(ShortCodeCounter.value).filter(ShortCodeCounter.name == self.name).scalar()
+                    db.commit()
+                    return end - size
+
+                db.add(ShortCodeCounter(name=self.name, value=size))
+                try:
+                    db.commit()
+                    return 0
+                except IntegrityError:
+                    # Another worker created the row first; lease from it instead
+                    db.rollback()
+        finally:
+            db.close()
+
+
+class RedisCounter:
+    """Leases id blocks with a single INCRBY."""
+
+    def __init__(self, name: str):
+        from .redis_client import redis_client
+
+        self.client = redis_client
+        self.key = f"short_code_counter:{name}"
+
+    def lease(self, size: int) -> int:
+        return self.client.incrby(self.key, size) - size
+
+
+class RandomAllocator:
+    """Legacy allocator drawing random codes; uniqueness is left to the database."""
+
+    guarantees_unique = False
+
+    def __init__(self, length: int):
+        self.length = length
+
+    def allocate(self) -> str:
+        return ''.join(random.choice(ALPHABET) for _ in range(self.length))
+
+    def allocate_many(self, count: int) -> List[str]:
+        return [self.allocate() for _ in range(count)]
+
+
+class SequenceAllocator:
+    """
+    Allocates codes from a shared counter, leased in blocks per process.
+
+    Every id is handed out once, so codes never collide with each other.
+    A custom alias can still hold a code before it is generated; callers
+    skip such a code by allocating again. With a permutation the ids are
+    scrambled into non-sequential codes; without one they are plain
+    fixed-width base62 numbers.
+    """
+
+    guarantees_unique = True
+
+    def __init__(self, counter, block_size: int, length: int, permutation: Optional[FeistelPermutation] = None):
+        self.counter = counter
+        self.block_size = block_size
+        self.length = length
+        self.capacity = 62 ** length
+        self.permutation = permutation
+        self._next = 0
+        self._end = 0
+        self._lock = threading.Lock()
+
+    def _take(self, count: int) -> List[int]:
+        ids = []
+        with self._lock:
+            while len(ids) < count:
+                if self._next >= self._end:
+                    self._next = self.counter.lease(self.block_size)
+                    self._end = self._next + self.block_size
+                take = min(count - len(ids), self._end - self._next)
+                ids.extend(range(self._next, self._next + take))
+                self._next += take
+        if ids and ids[-1] >= self.capacity:
+            raise RuntimeError("Short code space exhausted; increase SHORT_CODE_LENGTH")
+        return ids
+
+    def _encode(self, value: int) -> str:
+        if self.permutation is not None:
+            value = self.permutation.permute(value)
+        return encode_base62(value, self.length)
+
+    def allocate(self) -> str:
+        return self._encode(self._take(1)[0])
+
+    def allocate_many(self, count: int) -> List[str]:
+        return [self._encode(value) for value in self._take(count)]
+
+
+@lru_cache()
+def get_allocator():
+    """Build the allocator selected by SHORT_CODE_ALLOCATOR."""
+    kind = settings.SHORT_CODE_ALLOCATOR
+    if kind == "random":
+        return RandomAllocator(settings.SHORT_CODE_LENGTH)
+
+    if settings.SHORT_CODE_COUNTER_BACKEND == "redis":
+        counter = RedisCounter(settings.SHORT_CODE_COUNTER_NAME)
+    else:
+        counter = DatabaseCounter(settings.SHORT_CODE_COUNTER_NAME)
+
+    permutation = None
+    if kind == "feistel":
+        key = (settings.SHORT_CODE_FEISTEL_KEY or settings.SECRET_KEY).encode()
+        permutation = FeistelPermutation(62 ** settings.SHORT_CODE_LENGTH, key)
+    elif kind != "counter":
+        raise ValueError(f"Unknown SHORT_CODE_ALLOCATOR: {kind}")
+
+    return SequenceAllocator(counter, settings.SHORT_CODE_BLOCK_SIZE, settings.SHORT_CODE_LENGTH, permutation)
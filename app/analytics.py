@@ -0,0 +1,264 @@
+import logging
+import threading
+from collections import Counter, deque
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from sqlalchemy import insert, update
+
+from .config import get_settings
+from .database import SessionLocal
+from .models import ClickEvent, ClickRollup
+from .resilience import database_breaker
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+# Checked in order, so more specific tokens come before the ones they contain
+UA_FAMILIES = [
+    ("bot", "Bot"), ("spider", "Bot"), ("crawl", "Bot"), ("curl/", "curl"), ("wget/", "Wget"),
+    ("python-requests", "python-requests"), ("edg/", "Edge"), ("opr/", "Opera"), ("yabrowser", "Yandex"),
+    ("samsungbrowser", "Samsung Internet"), ("firefox/", "Firefox"), ("chrome/", "Chrome"),
+    ("crios/", "Chrome"), ("safari/", "Safari"),
+]
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    if granularity == "minute":
+        return moment.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def naive_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    """Convert an aware datetime to the naive UTC the tables store; naive ones are taken as UTC already."""
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def ua_family(user_agent: Optional[str]) -> Optional[str]:
+    """Coarse browser family from a User-Agent header."""
+    if not user_agent:
+        return None
+    lowered = user_agent.lower()
+    for token, family in UA_FAMILIES:
+        if token in lowered:
+            return family
+    return "Other"
+
+
+def referrer_host(referrer: Optional[str]) -> Optional[str]:
+    if not referrer:
+        return None
+    host = urlparse(referrer).hostname
+    return host[:255] if host else None
+
+
+class CountryResolver:
+    """Country lookup from a local MaxMind database; disabled when geoip2 or the file is missing."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._reader = None
+        self._loaded = False
+
+    def _load(self):
+        self._loaded = True
+        if not self.path:
+            return
+        try:
+            import geoip2.database
+            self._reader = geoip2.database.Reader(self.path)
+        except Exception:
+            logger.warning("GeoIP database %s could not be loaded; countries will not be recorded", self.path)
+
+    def country(self, ip: Optional[str]) -> Optional[str]:
+        if not self._loaded:
+            self._load()
+        if self._reader is None or not ip:
+            return None
+        try:
+            return self._reader.country(ip).country.iso_code
+        except Exception:
+            return None
+
+
+def _upsert_rollups(connection, counts: Dict[Tuple[str, str, datetime], int]) -> None:
+    table = ClickRollup.__table__
+    rows = [
+        {"short_code": short_code, "granularity": granularity, "bucket_start": start, "clicks": clicks}
+        for (short_code, granularity, start), clicks in counts.items()
+    ]
+
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        statement = dialect_insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.short_code, table.c.granularity, table.c.bucket_start],
+            set_={"clicks": table.c.clicks + statement.excluded.clicks}
+        )
+        connection.execute(statement, rows)
+        return
+
+    for row in rows:
+        result = connection.execute(
+            update(table)
+            .where(
+                table.c.short_code == row["short_code"],
+                table.c.granularity == row["granularity"],
+                table.c.bucket_start == row["bucket_start"]
+            )
+            .values(clicks=table.c.clicks + row["clicks"])
+        )
+        if not result.rowcount:
+            connection.execute(insert(table), row)
+
+
+class ClickEventLog:
+    """
+    Append-only buffer of redirect click events.
+
+    The redirect path only appends a raw tuple; referrer host, UA family
+    and country are derived when a background thread drains the buffer.
+    Each drained batch is inserted into click_events and folded into the
+    minute/hour/day rollups in the same transaction, so the rollups stay
+    exact. When the buffer is full the oldest events are dropped and
+    counted in `dropped`. A batch whose write failed is held outside the
+    buffer and retried first, so it never pushes newer events out.
+    """
+
+    def __init__(self, interval: float, batch_size: int, max_buffer: int, countries: CountryResolver):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.countries = countries
+        self.dropped = 0
+        self._events: deque = deque(maxlen=max_buffer)
+        self._failed: List[tuple] = []
+        self._flush_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def record(self, short_code: str, referrer: Optional[str], user_agent: Optional[str], ip: Optional[str]) -> None:
+        if len(self._events) == self._events.maxlen:
+            self.dropped += 1
+        self._events.append((datetime.utcnow(), short_code, referrer, user_agent, ip))
+
+    def pending(self) -> int:
+        return len(self._events) + len(self._failed)
+
+    def _take(self) -> List[tuple]:
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._events.popleft())
+            except IndexError:
+                break
+        return batch
+
+    def _write(self, batch: List[tuple]) -> None:
+        rows = []
+        counts: Counter = Counter()
+        for occurred_at, short_code, referrer, user_agent, ip in batch:
+            rows.append({
+                "short_code": short_code,
+                "occurred_at": occurred_at,
+                "referrer_host": referrer_host(referrer),
+                "ua_family": ua_family(user_agent),
+                "country": self.countries.country(ip)
+            })
+            for granularity in GRANULARITIES:
+                counts[(short_code, granularity, bucket_start(occurred_at, granularity))] += 1
+
+        db = SessionLocal()
+        try:
+            connection = db.connection()
+            connection.execute(insert(ClickEvent.__table__), rows)
+            _upsert_rollups(connection, counts)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def drain(self) -> int:
+        """Write all buffered events in batches and return how many were written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._failed or self._take()
+                self._failed = []
+                if not batch:
+                    return written
+                try:
+                    self._write(batch)
+                except Exception:
+                    # Kept aside for the next attempt; the buffer may already be full again
+                    self._failed = batch
+                    raise
+                written += len(batch)
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.interval):
+            if database_breaker.is_open:
+                continue
+            try:
+                self.drain()
+            except Exception:
+                logger.exception("Failed to write click events")
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="click-events", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the drain thread and write out whatever is still buffered."""
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+        self.drain()
+
+
+def click_timeseries(db, short_code: str, granularity: str, since: datetime, until: datetime) -> List[Tuple[datetime, int]]:
+    """Dense per-bucket click counts in [since, until), read from the rollups only."""
+    step = GRANULARITIES[granularity]
+    start = bucket_start(since, granularity)
+    rows = db.query(ClickRollup.bucket_start, ClickRollup.clicks).filter(
+        ClickRollup.short_code == short_code,
+        ClickRollup.granularity == granularity,
+        ClickRollup.bucket_start >= start,
+        ClickRollup.bucket_start < until
+    ).all()
+    counts = {row.bucket_start: row.clicks for row in rows}
+
+    series = []
+    current = start
+    while current < until:
+        series.append((current, counts.get(current, 0)))
+        current += step
+    return series
+
+
+click_event_log = ClickEventLog(
+    settings.CLICK_EVENTS_FLUSH_INTERVAL_SECONDS,
+    settings.CLICK_EVENTS_BATCH_SIZE,
+    settings.CLICK_EVENTS_BUFFER_SIZE,
+    CountryResolver(settings.GEOIP_DATABASE_PATH)
+)
@@ -0,0 +1,365 @@
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import redis
+import redis.asyncio
+
+from .config import get_settings
+from .metrics import CACHE_LOCAL_HIT, CACHE_LOCAL_MISS, CACHE_REDIS_HIT, CACHE_REDIS_MISS
+from .redis_client import redis_client, async_redis_client
+from .resilience import redis_breaker
+
+settings = get_settings()
+
+# Marker cached for short codes that are known not to exist.
+MISSING = object()
+
+
+class CachedLink(NamedTuple):
+    original_url: str
+    expires_at: Optional[datetime]
+
+
+class LocalCache:
+    """Bounded in-process LRU map with a per-entry TTL."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        """Return the cached value, or None if absent or expired."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, deadline = item
+            # Expired entries stay until evicted so get_stale() can still use them
+            if deadline < time.monotonic():
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def get_stale(self, key: str, max_stale: float) -> Any:
+        """Return the value even if expired, as long as it expired less than max_stale seconds ago."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, deadline = item
+            if deadline + max_stale < time.monotonic():
+                return None
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entry when full."""
+        deadline = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, deadline)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class SingleFlight:
+    """Collapses concurrent calls for the same key into one; the others wait for its result."""
+
+    def __init__(self):
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+        if not owner:
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines sharing one event loop."""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._inflight.get(key)
+        if future is not None:
+            # Shielded so a cancelled waiter does not cancel the shared load
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark it retrieved so a load nobody else waited on does not log a warning
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+
+# Deletes the given link keys and stamps each with a new value of the
+# epoch counter. KEYS[1] is the counter, the rest are link keys; ARGV[1]
+# is how long the stamps are kept.
+_INVALIDATE_SCRIPT = """
+local epoch = redis.call("INCR", KEYS[1])
+for i = 2, #KEYS do
+    redis.call("DEL", KEYS[i])
+    redis.call("SET", KEYS[i] .. ":invalidated", epoch, "EX", ARGV[1])
+end
+return epoch
+"""
+
+# Writes link keys unless they were invalidated after the given epoch.
+# ARGV is the epoch, the TTL, then one encoded value per key. Returns how
+# many keys were written.
+_SET_IF_NOT_INVALIDATED_SCRIPT = """
+local since = tonumber(ARGV[1])
+local written = 0
+for i = 1, #KEYS do
+    if tonumber(redis.call("GET", KEYS[i] .. ":invalidated") or "0") <= since then
+        redis.call("SETEX", KEYS[i], ARGV[2], ARGV[i + 2])
+        written = written + 1
+    end
+end
+return written
+"""
+
+
+class CacheEpoch(NamedTuple):
+    """Invalidation counters read before loading rows; see LinkCache.epoch()."""
+
+    local: int
+    # None when Redis could not be read, in which case nothing is written to it
+    remote: Optional[int]
+
+
+class LinkCache:
+    """
+    Two-tier read-through cache of short_code -> CachedLink.
+
+    The in-process tier is checked first, then Redis. Redis errors are
+    treated as misses so the database remains the source of truth, and
+    Redis calls go through redis_breaker so an outage costs nothing once
+    the breaker opens. The local TTL is kept short because invalidation
+    only reaches the local tier of the process that performed the update.
+
+    Every invalidation is stamped with an epoch, locally and in Redis.
+    Loaders take epoch() before reading rows and pass it to the set
+    methods, which skip codes invalidated in the meantime, so a slow load
+    cannot re-cache a URL that was just changed.
+    """
+
+    KEY_PREFIX = "link:"
+    # Outside KEY_PREFIX, where it could clash with a short code
+    EPOCH_KEY = "link_cache_epoch"
+
+    def __init__(
+        self,
+        local: LocalCache,
+        client: Optional[redis.Redis] = None,
+        async_client: Optional[redis.asyncio.Redis] = None
+    ):
+        self.local = local
+        self.client = client
+        self.async_client = async_client
+        # short_code -> local epoch of its last invalidation, kept as long as Redis keeps its stamps
+        self._invalidated = LocalCache(local.max_size, settings.LINK_CACHE_TTL_SECONDS)
+        self._local_epoch = 0
+        self._lock = threading.Lock()
+        if client is not None:
+            self._invalidate_script = client.register_script(_INVALIDATE_SCRIPT)
+            self._set_if_not_invalidated = client.register_script(_SET_IF_NOT_INVALIDATED_SCRIPT)
+        if async_client is not None:
+            self._aset_if_not_invalidated = async_client.register_script(_SET_IF_NOT_INVALIDATED_SCRIPT)
+
+    def _key(self, short_code: str) -> str:
+        return self.KEY_PREFIX + short_code
+
+    @staticmethod
+    def _encode(value: Any) -> str:
+        if value is MISSING:
+            return ""
+        return json.dumps({
+            "url": value.original_url,
+            "expires_at": value.expires_at.isoformat() if value.expires_at else None
+        })
+
+    @staticmethod
+    def _decode(raw: str) -> Any:
+        if raw == "":
+            return MISSING
+        data = json.loads(raw)
+        expires_at = datetime.fromisoformat(data["expires_at"]) if data["expires_at"] else None
+        return CachedLink(data["url"], expires_at)
+
+    def get(self, short_code: str) -> Any:
+        """Return a CachedLink, MISSING for known-unknown codes, or None on a miss."""
+        value = self.local.get(short_code)
+        if value is not None:
+            CACHE_LOCAL_HIT.inc()
+            return value
+        CACHE_LOCAL_MISS.inc()
+        if self.client is None:
+            return None
+
+        raw = redis_breaker.call(lambda: self.client.get(self._key(short_code)))
+        if raw is None:
+            CACHE_REDIS_MISS.inc()
+            return None
+        CACHE_REDIS_HIT.inc()
+
+        value = self._decode(raw)
+        self._set_local(short_code, value)
+        return value
+
+    async def aget(self, short_code: str) -> Any:
+        """Async variant of get() for handlers running on the event loop."""
+        value = self.local.get(short_code)
+        if value is not None:
+            CACHE_LOCAL_HIT.inc()
+            return value
+        CACHE_LOCAL_MISS.inc()
+        if self.async_client is None:
+            return None
+
+        raw = await redis_breaker.acall(lambda: self.async_client.get(self._key(short_code)))
+        if raw is None:
+            CACHE_REDIS_MISS.inc()
+            return None
+        CACHE_REDIS_HIT.inc()
+
+        value = self._decode(raw)
+        self._set_local(short_code, value)
+        return value
+
+    def set(self, short_code: str, link: CachedLink, since: CacheEpoch) -> None:
+        self._store([(short_code, link)], since, settings.LINK_CACHE_TTL_SECONDS)
+
+    def set_missing(self, short_code: str, since: CacheEpoch) -> None:
+        self._store([(short_code, MISSING)], since, settings.LINK_CACHE_NEGATIVE_TTL_SECONDS)
+
+    def set_many(self, links: List[Tuple[str, CachedLink]], since: CacheEpoch) -> int:
+        """Store several links in both tiers with one Redis round trip; returns how many were stored locally."""
+        return self._store(links, since, settings.LINK_CACHE_TTL_SECONDS)
+
+    def epoch(self) -> CacheEpoch:
+        """Current invalidation counters; take this before reading the rows to be cached."""
+        remote = None
+        if self.client is not None:
+            remote = redis_breaker.call(lambda: int(self.client.get(self.EPOCH_KEY) or 0))
+        return CacheEpoch(self._local_epoch, remote)
+
+    async def aset(self, short_code: str, link: CachedLink, since: CacheEpoch) -> None:
+        await self._astore([(short_code, link)], since, settings.LINK_CACHE_TTL_SECONDS)
+
+    async def aset_missing(self, short_code: str, since: CacheEpoch) -> None:
+        await self._astore([(short_code, MISSING)], since, settings.LINK_CACHE_NEGATIVE_TTL_SECONDS)
+
+    async def aepoch(self) -> CacheEpoch:
+        """Async variant of epoch()."""
+        async def read():
+            return int(await self.async_client.get(self.EPOCH_KEY) or 0)
+
+        remote = None
+        if self.async_client is not None:
+            remote = await redis_breaker.acall(read)
+        return CacheEpoch(self._local_epoch, remote)
+
+    def invalidate(self, short_code: str) -> None:
+        """Drop a short code from both tiers."""
+        self.invalidate_many([short_code])
+
+    def invalidate_many(self, short_codes: List[str]) -> None:
+        """Drop several short codes from both tiers with a single Redis call."""
+        with self._lock:
+            self._local_epoch += 1
+            for short_code in short_codes:
+                self.local.delete(short_code)
+                self._invalidated.set(short_code, self._local_epoch)
+        if self.client is None or not short_codes:
+            return
+        keys = [self.EPOCH_KEY] + [self._key(short_code) for short_code in short_codes]
+        redis_breaker.call(lambda: self._invalidate_script(keys=keys, args=[settings.LINK_CACHE_TTL_SECONDS]))
+
+    def _set_local(self, short_code: str, value: Any) -> None:
+        ttl = settings.LINK_CACHE_LOCAL_TTL_SECONDS
+        if value is MISSING:
+            ttl = min(ttl, settings.LINK_CACHE_NEGATIVE_TTL_SECONDS)
+        self.local.set(short_code, value, ttl=ttl)
+
+    def _store_local(self, items: List[Tuple[str, Any]], since: CacheEpoch) -> int:
+        """Set the local entries not invalidated after `since`; Redis is handled by the callers."""
+        stored = 0
+        with self._lock:
+            for short_code, value in items:
+                if (self._invalidated.get(short_code) or 0) > since.local:
+                    continue
+                self._set_local(short_code, value)
+                stored += 1
+        return stored
+
+    def _conditional_write(self, items: List[Tuple[str, Any]], since: CacheEpoch, ttl: int) -> Tuple[List[str], list]:
+        keys = [self._key(short_code) for short_code, _ in items]
+        return keys, [since.remote, ttl] + [self._encode(value) for _, value in items]
+
+    def _store(self, items: List[Tuple[str, Any]], since: CacheEpoch, ttl: int) -> int:
+        stored = self._store_local(items, since)
+        # Without the Redis epoch there is no way to tell whether a write would resurrect an old URL
+        if self.client is None or since.remote is None or not items:
+            return stored
+        keys, args = self._conditional_write(items, since, ttl)
+        redis_breaker.call(lambda: self._set_if_not_invalidated(keys=keys, args=args))
+        return stored
+
+    async def _astore(self, items: List[Tuple[str, Any]], since: CacheEpoch, ttl: int) -> int:
+        stored = self._store_local(items, since)
+        if self.async_client is None or since.remote is None or not items:
+            return stored
+        keys, args = self._conditional_write(items, since, ttl)
+        await redis_breaker.acall(lambda: self._aset_if_not_invalidated(keys=keys, args=args))
+        return stored
+
+link_cache = LinkCache(
+    LocalCache(settings.LINK_CACHE_MAX_SIZE, settings.LINK_CACHE_LOCAL_TTL_SECONDS),
+    redis_client if settings.REDIS_CACHE_ENABLED else None,
+    async_redis_client if settings.REDIS_CACHE_ENABLED else None
+)
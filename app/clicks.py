@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import bindparam, case, update
+
+from .config import get_settings
+from .database import SessionLocal
+from .models import Link
+from .metrics import CLICK_FLUSH_SECONDS, CLICK_FLUSH_LAG_SECONDS
+from .resilience import database_breaker
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+links_table = Link.__table__
+
+# One executemany statement applies every pending (short_code, n, last_accessed) triple.
+_flush_statement = (
+    update(links_table)
+    .where(links_table.c.short_code == bindparam("b_short_code"))
+    .values(
+        click_count=links_table.c.click_count + bindparam("b_clicks"),
+        last_accessed=case(
+            (links_table.c.last_accessed.is_(None), bindparam("b_last_accessed")),
+            (links_table.c.last_accessed < bindparam("b_last_accessed"), bindparam("b_last_accessed")),
+            else_=links_table.c.last_accessed
+        )
+    )
+)
+
+
+class ClickBuffer:
+    """
+    Write-behind buffer for redirect clicks.
+
+    Clicks are aggregated in memory per short code and applied to the
+    database in batches by a background thread, either every
+    CLICK_FLUSH_INTERVAL_SECONDS or as soon as CLICK_FLUSH_MAX_PENDING
+    clicks are waiting. A failed flush puts its counts back, so no click
+    is lost as long as the process shuts down through stop().
+    """
+
+    def __init__(self, interval: float, max_pending: int):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending: Dict[str, Tuple[int, datetime]] = {}
+        self._pending_clicks = 0
+        # Monotonic time of the first click in the current batch, for flush lag
+        self._oldest: Optional[float] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def record(self, short_code: str) -> None:
+        """Count one click on a short code."""
+        now = datetime.utcnow()
+        with self._lock:
+            clicks, _ = self._pending.get(short_code, (0, now))
+            self._pending[short_code] = (clicks + 1, now)
+            if not self._pending_clicks:
+                self._oldest = time.monotonic()
+            self._pending_clicks += 1
+            full = self._pending_clicks >= self.max_pending
+        if full:
+            self._wakeup.set()
+
+    def pending(self) -> int:
+        return self._pending_clicks
+
+    def _take(self) -> Tuple[Dict[str, Tuple[int, datetime]], Optional[float]]:
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            oldest, self._oldest = self._oldest, None
+            self._pending_clicks = 0
+        return batch, oldest
+
+    def _restore(self, batch: Dict[str, Tuple[int, datetime]], oldest: Optional[float]) -> None:
+        with self._lock:
+            if oldest is not None and (self._oldest is None or oldest < self._oldest):
+                self._oldest = oldest
+            for short_code, (clicks, last_accessed) in batch.items():
+                pending_clicks, pending_last = self._pending.get(short_code, (0, last_accessed))
+                self._pending[short_code] = (pending_clicks + clicks, max(pending_last, last_accessed))
+                self._pending_clicks += clicks
+
+    def flush(self) -> int:
+        """Apply all pending clicks to the database and return how many were written."""
+        with self._flush_lock:
+            batch, oldest = self._take()
+            if not batch:
+                return 0
+
+            params = [
+                {"b_short_code": short_code, "b_clicks": clicks, "b_last_accessed": last_accessed}
+                for short_code, (clicks, last_accessed) in batch.items()
+            ]
+            started = time.perf_counter()
+            db = SessionLocal()
+            try:
+                db.connection().execute(_flush_statement, params)
+                db.commit()
+            except Exception:
+                db.rollback()
+                self._restore(batch, oldest)
+                raise
+            finally:
+                db.close()
+            CLICK_FLUSH_SECONDS.observe(time.perf_counter() - started)
+            if oldest is not None:
+                CLICK_FLUSH_LAG_SECONDS.set(time.monotonic() - oldest)
+            return sum(clicks for clicks, _ in batch.values())
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if database_breaker.is_open:
+                # Keep counting in memory; the totals are replayed once the probe closes the breaker
+                continue
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush click counts")
+
+    def start(self) -> None:
+        """Start the background flusher thread."""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="click-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the flusher and write out whatever is still pending."""
+        if self._thread is not None:
+            self._stopping.set()
+            self._wakeup.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+
+click_buffer = ClickBuffer(settings.CLICK_FLUSH_INTERVAL_SECONDS, settings.CLICK_FLUSH_MAX_PENDING)
@@ -1,16 +1,155 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional, List
 
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./shortener.db"
+    # Optional read replicas for the read-only endpoints (redirects, search, stats).
+    # DATABASE_REPLICA_URL is a single-replica shorthand for DATABASE_REPLICA_URLS.
+    DATABASE_REPLICA_URL: Optional[str] = None
+    DATABASE_REPLICA_URLS: List[str] = []
+    REPLICA_HEALTH_CHECK_INTERVAL_SECONDS: float = 5.0
+    # After a user writes a link, their reads (and reads of that link) go to the primary for this long
+    REPLICA_STICKY_SECONDS: int = 10
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Checkouts that wait at least this long are logged with the pool status
+    DB_POOL_SLOW_CHECKOUT_SECONDS: float = 1.0
+    # How long the driver waits to open a connection, so an unreachable server fails fast
+    DB_CONNECT_TIMEOUT_SECONDS: int = 3
     REDIS_URL: str = "redis://localhost:6379/0"
+    # Redis is only a cache and coordination layer, so calls fail fast rather than stall requests
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 0.25
+    REDIS_CONNECT_TIMEOUT_SECONDS: float = 0.25
+    # Circuit breakers for the database and Redis: open after this many consecutive failures,
+    # then let one trial call through every CIRCUIT_BREAKER_RESET_SECONDS
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_BREAKER_RESET_SECONDS: float = 10.0
     SECRET_KEY: str = "your-secret-key-here"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
-    SHORT_CODE_LENGTH: int = 6
+    # How long a verified token is trusted without re-checking the user row
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_SIZE: int = 10000
+    # bcrypt cost; existing hashes are upgraded on the next successful login
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    # Generated codes are one character longer than the legacy 6-char random codes,
+    # so they can never clash with links created before the allocator existed
+    SHORT_CODE_LENGTH: int = 7
+    SHORT_CODE_ALLOCATOR: str = "feistel"  # random | counter | feistel
+    SHORT_CODE_COUNTER_BACKEND: str = "db"  # db | redis
+    SHORT_CODE_COUNTER_NAME: str = "links"
+    SHORT_CODE_BLOCK_SIZE: int = 10000
+    SHORT_CODE_FEISTEL_KEY: str = ""  # defaults to SECRET_KEY
     MAX_CUSTOM_ALIAS_LENGTH: int = 50
     ALLOWED_CUSTOM_ALIAS_PATTERN: str = r"^[a-zA-Z0-9_-]+$"
+    # Optional file with extra unsafe URL patterns, one regex per line
+    UNSAFE_PATTERNS_FILE: Optional[str] = None
+
+    # Content-type probe for URLs without a safe extension
+    PROBE_TIMEOUT_SECONDS: float = 5.0
+    PROBE_POOL_SIZE: int = 20
+    PROBE_CACHE_MAX_SIZE: int = 10000
+    PROBE_CACHE_TTL_SECONDS: int = 600
+    PROBE_FAILURE_TTL_SECONDS: int = 60
+
+    # Bulk link creation
+    BULK_MAX_ITEMS: int = 50000
+    # Larger bodies are refused with 413 before or while they are read, not after buffering them
+    BULK_MAX_BODY_BYTES: int = 50 * 1024 * 1024
+    BULK_CHUNK_SIZE: int = 500
+    BULK_VALIDATION_CONCURRENCY: int = 16
+
+    # Serve GET /{short_code} from the asyncio engine instead of the threadpool
+    ASYNC_REDIRECTS: bool = False
+    # Status for GET /{short_code} (301, 302, 303, 307 or 308); Accept: application/json gets the old JSON body
+    REDIRECT_STATUS_CODE: int = 307
+    # How long browsers and CDNs may cache a redirect, capped by the link's expires_at.
+    # Cached redirects are not counted as clicks and edits take up to this long to show; 0 disables caching.
+    REDIRECT_CACHE_MAX_AGE_SECONDS: int = 60
+    # Serve GET /{short_code} from a plain Starlette route that skips dependency injection and response models
+    REDIRECT_FAST_PATH: bool = True
+    # "full" serves the whole API; "redirect" serves only GET /{short_code} and /
+    SERVICE_MODE: str = "full"
+    # Prometheus metrics at GET /metrics
+    METRICS_ENABLED: bool = True
+
+    # Redirect resolution cache
+    REDIS_CACHE_ENABLED: bool = True
+    LINK_CACHE_MAX_SIZE: int = 10000
+    LINK_CACHE_LOCAL_TTL_SECONDS: int = 10
+    LINK_CACHE_TTL_SECONDS: int = 3600
+    LINK_CACHE_NEGATIVE_TTL_SECONDS: int = 30
+    # While the database is unavailable, redirects keep using local entries up to this long past their TTL
+    LINK_CACHE_STALE_SECONDS: int = 3600
+
+    # Redirect cache warmup: preload the hot set at startup and refresh it periodically
+    CACHE_WARMUP_ENABLED: bool = True
+    # "clicks" ranks by lifetime click_count, "recent" by hourly rollups over CACHE_WARMUP_RECENT_HOURS
+    CACHE_WARMUP_STRATEGY: str = "clicks"
+    CACHE_WARMUP_TOP_N: int = 10000
+    CACHE_WARMUP_CHUNK_SIZE: int = 500
+    CACHE_WARMUP_RECENT_HOURS: int = 24
+    CACHE_WARMUP_INTERVAL_SECONDS: float = 300.0
+
+    # Write-behind click counting
+    CLICK_FLUSH_INTERVAL_SECONDS: float = 5.0
+    CLICK_FLUSH_MAX_PENDING: int = 1000
+
+    # Per-click event log and time-bucketed rollups
+    CLICK_EVENTS_ENABLED: bool = True
+    CLICK_EVENTS_FLUSH_INTERVAL_SECONDS: float = 5.0
+    CLICK_EVENTS_BATCH_SIZE: int = 5000
+    CLICK_EVENTS_BUFFER_SIZE: int = 200000
+    # Optional MaxMind GeoLite2/GeoIP2 Country database; requires the geoip2 package
+    GEOIP_DATABASE_PATH: Optional[str] = None
+    STATS_MAX_BUCKETS: int = 10000
+
+    # GET /links pagination
+    LINKS_PAGE_DEFAULT_SIZE: int = 50
+    LINKS_PAGE_MAX_SIZE: int = 1000
+    LINKS_PAGE_FETCH_SIZE: int = 200
+
+    # Expired-link sweeper
+    SWEEPER_ENABLED: bool = True
+    # "archive" copies swept links into archived_links first; "delete" just removes them
+    SWEEPER_MODE: str = "archive"
+    SWEEPER_INTERVAL_SECONDS: float = 300.0
+    SWEEPER_BATCH_SIZE: int = 500
+    SWEEPER_BATCH_PAUSE_SECONDS: float = 0.5
+    # Expired links keep answering 410 for this long before they are swept
+    SWEEPER_TOMBSTONE_SECONDS: int = 86400
+
+    # Rate limiting. Rules are "<count>/<seconds>" over a sliding window; empty disables a rule.
+    RATE_LIMIT_ENABLED: bool = True
+    # "memory" counts per worker process; "redis" shares the counters across workers
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_SHORTEN_PER_IP: str = "120/60"
+    RATE_LIMIT_SHORTEN_PER_USER: str = "60/60"
+    RATE_LIMIT_BULK_PER_IP: str = "20/60"
+    RATE_LIMIT_BULK_PER_USER: str = "10/60"
+    RATE_LIMIT_LOGIN_PER_IP: str = "30/60"
+    # Caps failed guesses against one account however many addresses they come from;
+    # successful logins are not counted
+    RATE_LIMIT_LOGIN_PER_USERNAME: str = "10/300"
+    RATE_LIMIT_REGISTER_PER_IP: str = "10/3600"
+    # Only enable behind a proxy that overwrites X-Forwarded-For, otherwise clients can pick their own key
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False
+
+    # Columnar export
+    EXPORT_BATCH_SIZE: int = 10000
+    # Usernames allowed to call the /admin endpoints
+    ADMIN_USERNAMES: List[str] = []
+
+    # Background link preview fetching
+    PREVIEW_WORKER_CONCURRENCY: int = 4
+    PREVIEW_MAX_ATTEMPTS: int = 3
+    PREVIEW_RETRY_BACKOFF_SECONDS: float = 2.0
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,90 @@
+import redis
+import redis.asyncio
+from typing import Optional
+
+from .cache import LocalCache
+from .config import get_settings
+from .database import REPLICA_URLS
+from .redis_client import redis_client, async_redis_client
+from .resilience import redis_breaker
+
+settings = get_settings()
+
+
+class ReadYourWrites:
+    """
+    Short primary-stickiness windows after writes.
+
+    After a user creates or changes a link, reads for that user and for
+    that short code are sent to the primary for REPLICA_STICKY_SECONDS,
+    so they never observe a replica that has not caught up. Marks are
+    kept locally and mirrored to Redis so other workers honour them too.
+    Without replicas every check is a no-op.
+    """
+
+    KEY_PREFIX = "sticky:"
+
+    def __init__(
+        self,
+        enabled: bool,
+        window: int,
+        max_size: int,
+        client: Optional[redis.Redis] = None,
+        async_client: Optional[redis.asyncio.Redis] = None
+    ):
+        self.enabled = enabled
+        self.window = window
+        self.client = client
+        self.async_client = async_client
+        self.local = LocalCache(max_size, window)
+
+    def mark(self, user_id: Optional[str] = None, short_codes=()) -> None:
+        if not self.enabled:
+            return
+        keys = [f"code:{code}" for code in short_codes]
+        if user_id:
+            keys.append(f"user:{user_id}")
+        for key in keys:
+            self.local.set(key, True)
+        if self.client is None or not keys:
+            return
+
+        def store():
+            pipeline = self.client.pipeline(transaction=False)
+            for key in keys:
+                pipeline.setex(self.KEY_PREFIX + key, self.window, 1)
+            pipeline.execute()
+
+        redis_breaker.call(store)
+
+    def _is_sticky(self, key: str) -> bool:
+        if self.local.get(key):
+            return True
+        if self.client is None:
+            return False
+        return bool(redis_breaker.call(lambda: self.client.exists(self.KEY_PREFIX + key), False))
+
+    async def _ais_sticky(self, key: str) -> bool:
+        if self.local.get(key):
+            return True
+        if self.async_client is None:
+            return False
+        return bool(await redis_breaker.acall(lambda: self.async_client.exists(self.KEY_PREFIX + key), False))
+
+    def user_is_sticky(self, user_id: str) -> bool:
+        return self.enabled and self._is_sticky(f"user:{user_id}")
+
+    def code_is_sticky(self, short_code: str) -> bool:
+        return self.enabled and self._is_sticky(f"code:{short_code}")
+
+    async def acode_is_sticky(self, short_code: str) -> bool:
+        return self.enabled and await self._ais_sticky(f"code:{short_code}")
+
+
+read_your_writes = ReadYourWrites(
+    bool(REPLICA_URLS),
+    settings.REPLICA_STICKY_SECONDS,
+    settings.LINK_CACHE_MAX_SIZE,
+    redis_client if settings.REDIS_CACHE_ENABLED else None,
+    async_redis_client if settings.REDIS_CACHE_ENABLED else None
+)
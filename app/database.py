@@ -1,23 +1,446 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from collections import deque
+from typing import Dict, List, Optional
+import itertools
+import logging
+import math
 import os
+import threading
+import time
+
+from .config import settings
+from .exceptions import ServiceUnavailableError
+from .resilience import DATABASE_ERRORS, database_breaker
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_url(url: str) -> str:
+    # If using PostgreSQL on Render, we need to replace the URL scheme
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql://", 1)
+    return url
+
 
 # Get database URL from environment variable or use SQLite as default
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./shortener.db")
+DATABASE_URL = _normalize_url(os.getenv("DATABASE_URL", "sqlite:///./shortener.db"))
+REPLICA_URLS: List[str] = list(dict.fromkeys(
+    _normalize_url(url)
+    for url in settings.DATABASE_REPLICA_URLS + ([settings.DATABASE_REPLICA_URL] if settings.DATABASE_REPLICA_URL else [])
+))
+
+
+class PoolMonitor:
+    """
+    Collects pool metrics for one engine through SQLAlchemy pool events.
+
+    Checkout wait is timed by the instrumented pool classes below (there
+    is no "checkout started" event); connection opens, closes,
+    invalidations and lifetimes come from the pool event hooks.
+    """
+
+    def __init__(self, name: str, engine, sample_size: int = 1024):
+        self.name = name
+        self.engine = engine
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.connections_opened = 0
+        self.connections_closed = 0
+        self.invalidations = 0
+        self.lifetime_total = 0.0
+        self.lifetime_max = 0.0
+        self._waits = deque(maxlen=sample_size)
+        self._wait_max = 0.0
+        self._lock = threading.Lock()
+
+        engine.pool.monitor = self
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "close", self._on_close)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def observe_checkout(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.checkout_timeouts += 1
+            else:
+                self.checkouts += 1
+            self._waits.append(seconds)
+            self._wait_max = max(self._wait_max, seconds)
+        if seconds >= settings.DB_POOL_SLOW_CHECKOUT_SECONDS:
+            pool = self.engine.pool
+            logger.warning(
+                "Slow %s pool checkout: waited %.2fs (%s), status: %s",
+                self.name, seconds, "timed out" if timed_out else "ok", pool.status()
+            )
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        connection_record.info["connected_at"] = time.monotonic()
+        with self._lock:
+            self.connections_opened += 1
+
+    def _on_close(self, dbapi_connection, connection_record) -> None:
+        connected_at = connection_record.info.pop("connected_at", None)
+        with self._lock:
+            self.connections_closed += 1
+            if connected_at is not None:
+                lifetime = time.monotonic() - connected_at
+                self.lifetime_total += lifetime
+                self.lifetime_max = max(self.lifetime_max, lifetime)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, object]:
+        pool = self.engine.pool
+        with self._lock:
+            waits = sorted(self._waits)
+            closed = self.connections_closed
+            stats = {
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.checkout_timeouts,
+                "connections_opened": self.connections_opened,
+                "connections_closed": closed,
+                "invalidations": self.invalidations,
+                "connection_lifetime_seconds": {
+                    "mean": round(self.lifetime_total / closed, 3) if closed else None,
+                    "max": round(self.lifetime_max, 3),
+                },
+            }
+            wait_max = self._wait_max
+        pick = lambda q: round(waits[min(len(waits) - 1, int(q * len(waits)))] * 1000, 3) if waits else None
+        stats["checkout_wait_ms"] = {"p50": pick(0.50), "p99": pick(0.99), "max": round(wait_max * 1000, 3)}
+        if isinstance(pool, QueuePool):
+            stats.update(size=pool.size(), checked_out=pool.checkedout(), overflow=max(0, pool.overflow()))
+        return stats
+
+
+class _TimedCheckout:
+    """Pool mixin that reports how long each checkout waited to its PoolMonitor."""
+
+    monitor: Optional[PoolMonitor] = None
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            if self.monitor is not None:
+                self.monitor.observe_checkout(time.perf_counter() - start, timed_out=True)
+            raise
+        if self.monitor is not None:
+            self.monitor.observe_checkout(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.monitor = self.monitor
+        return pool
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def _pool_options(url: str, asyncio: bool = False) -> dict:
+    """Engine keyword arguments for the pool and connect timeout settings in Settings."""
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    }
+    if url.startswith("postgresql"):
+        timeout_arg = "timeout" if asyncio else "connect_timeout"
+        options["connect_args"] = {timeout_arg: settings.DB_CONNECT_TIMEOUT_SECONDS}
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/") in ("sqlite:", "sqlite+aiosqlite:")):
+        # In-memory SQLite keeps its single-connection pool
+        return options
+    options.update(
+        poolclass=InstrumentedAsyncAdaptedQueuePool if asyncio else InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    )
+    return options
+
+
+# Engines (and their driver imports and pools) are created on first use
+# rather than at import, so importing the app stays cheap.
+_engines: Dict[str, object] = {}
+_engines_lock = threading.Lock()
+pool_monitors: Dict[str, PoolMonitor] = {}
+
+
+def _on_primary_error(context) -> None:
+    # A failed pre-ping is followed by a reconnect, which reports its own failure
+    if context.is_pre_ping:
+        return
+    if context.is_disconnect or isinstance(context.sqlalchemy_exception, DATABASE_ERRORS):
+        database_breaker.record_failure()
+
+
+def _on_primary_success(conn, cursor, statement, parameters, context, executemany) -> None:
+    database_breaker.record_success()
+
+
+def _watch_primary(engine) -> None:
+    """Feed the database circuit breaker from every statement run on the primary."""
+    event.listen(engine, "handle_error", _on_primary_error)
+    event.listen(engine, "after_cursor_execute", _on_primary_success)
+
+
+def _get_sync_engine(name: str, url: str):
+    engine = _engines.get(name)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(name)
+            if engine is None:
+                engine = create_engine(url, **_pool_options(url))
+                pool_monitors[name] = PoolMonitor(name, engine)
+                if name == "primary":
+                    _watch_primary(engine)
+                _engines[name] = engine
+    return engine
+
+
+def get_engine():
+    return _get_sync_engine("primary", DATABASE_URL)
+
+
+def _probe_primary() -> None:
+    # The statement goes through the primary's engine events, which close the breaker on success
+    with get_engine().connect() as connection:
+        connection.exec_driver_sql("SELECT 1")
+
+
+database_breaker.probe = _probe_primary
+
+
+class ReplicaSet:
+    """
+    Round-robin routing over the read replicas, skipping unhealthy ones.
+
+    A replica is ejected when a health check fails or when one of its
+    connections reports a disconnect, and is re-admitted by the next
+    successful health check. With no healthy replica, reads fall back to
+    the primary.
+    """
+
+    def __init__(self, urls: List[str], interval: float):
+        self.urls = {f"replica-{i}": url for i, url in enumerate(urls)}
+        self.interval = interval
+        self._healthy = set(self.urls)
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def choose(self) -> Optional[str]:
+        """Name of the next healthy replica, or None to use the primary."""
+        with self._lock:
+            healthy = [name for name in self.urls if name in self._healthy]
+            if not healthy:
+                return None
+            return healthy[next(self._counter) % len(healthy)]
+
+    def is_healthy(self, name: str) -> bool:
+        return name in self._healthy
 
-# If using PostgreSQL on Render, we need to replace the URL scheme
-if DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+    def eject(self, name: str, reason: object) -> None:
+        with self._lock:
+            if name not in self._healthy:
+                return
+            self._healthy.discard(name)
+        logger.warning("Ejected read replica %s: %s", name, reason)
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    def admit(self, name: str) -> None:
+        with self._lock:
+            if name in self._healthy:
+                return
+            self._healthy.add(name)
+        logger.info("Read replica %s is healthy again", name)
+
+    def engine(self, name: str):
+        engine = _engines.get(name)
+        if engine is None:
+            engine = _get_sync_engine(name, self.urls[name])
+            event.listen(engine, "handle_error", lambda context: self._on_error(name, context))
+        return engine
+
+    def _on_error(self, name: str, context) -> None:
+        if context.is_disconnect:
+            self.eject(name, context.original_exception)
+
+    def check(self) -> None:
+        """Ping every replica once, updating which ones receive reads."""
+        for name in self.urls:
+            try:
+                with self.engine(name).connect() as connection:
+                    connection.exec_driver_sql("SELECT 1")
+            except Exception as e:
+                self.eject(name, e)
+            else:
+                self.admit(name)
+
+    def _run(self) -> None:
+        while True:
+            self.check()
+            if self._stopping.wait(self.interval):
+                return
+
+    def start(self) -> None:
+        """Start the background health checker (a no-op without replicas)."""
+        if self._thread is not None or not self.urls:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+
+
+replicas = ReplicaSet(REPLICA_URLS, settings.REPLICA_HEALTH_CHECK_INTERVAL_SECONDS)
+
+
+def get_replica_engine():
+    """Engine of the next healthy replica, or the primary when there is none."""
+    name = replicas.choose()
+    if name is None:
+        return get_engine()
+    return replicas.engine(name)
+
+
+def dispose_engine():
+    for name in list(_engines):
+        engine = _engines.pop(name)
+        pool_monitors.pop(name, None)
+        engine.dispose()
+
+
+def pool_stats() -> Dict[str, Dict[str, object]]:
+    """Current metrics for every engine created so far."""
+    stats = {name: monitor.stats() for name, monitor in pool_monitors.items()}
+    for name, engine_stats in stats.items():
+        if name.startswith("replica-"):
+            engine_stats["healthy"] = replicas.is_healthy(name.replace("_async", ""))
+    return stats
+
+
+def __getattr__(name):
+    # Keeps `from app.database import engine` working without building it at import
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class LazyEngineSession(Session):
+    """Session bound to the shared engine, which is created when the first session is."""
+
+    def __init__(self, bind=None, **kwargs):
+        super().__init__(bind=bind or get_engine(), **kwargs)
+
+
+class ReplicaSession(Session):
+    """Read-only session bound to the next healthy replica (or the primary without one)."""
+
+    def __init__(self, bind=None, **kwargs):
+        super().__init__(bind=bind or get_replica_engine(), **kwargs)
+        self.info["replica"] = self.bind is not _engines.get("primary")
+
+
+SessionLocal = sessionmaker(class_=LazyEngineSession, autocommit=False, autoflush=False)
+ReplicaSessionLocal = sessionmaker(class_=ReplicaSession, autocommit=False, autoflush=False)
+
+
+def read_session(use_primary: bool = False) -> Session:
+    """Session for a read-only path; use_primary pins it to the writer for read-your-writes."""
+    return SessionLocal() if use_primary else ReplicaSessionLocal()
 
 Base = declarative_base()
 
+# Async engines are only built when async mode is used, so asyncpg/aiosqlite
+# stay optional for sync-only deployments.
+_async_engines: Dict[str, object] = {}
+_async_sessionmakers: Dict[str, object] = {}
+
+
+def get_async_database_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver."""
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+
+def get_async_sessionmaker(replica: bool = False):
+    name = (replicas.choose() if replica else None) or "primary"
+    if name not in _async_sessionmakers:
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+        url = get_async_database_url(DATABASE_URL if name == "primary" else replicas.urls[name])
+        engine = create_async_engine(url, **_pool_options(url, asyncio=True))
+        pool_monitors[f"{name}_async"] = PoolMonitor(f"{name}_async", engine.sync_engine)
+        if name != "primary":
+            event.listen(engine.sync_engine, "handle_error", lambda context: replicas._on_error(name, context))
+        else:
+            _watch_primary(engine.sync_engine)
+        _async_engines[name] = engine
+        _async_sessionmakers[name] = async_sessionmaker(
+            engine, autoflush=False, expire_on_commit=False, info={"replica": name != "primary"}
+        )
+    return _async_sessionmakers[name]
+
+
+async def dispose_async_engine():
+    for name in list(_async_engines):
+        await _async_engines.pop(name).dispose()
+        _async_sessionmakers.pop(name, None)
+        pool_monitors.pop(f"{name}_async", None)
+
+
+def _require_primary() -> None:
+    # While the breaker is open, fail in microseconds instead of waiting on connect timeouts.
+    # Trials are run by the breaker's probe, so rejecting here never holds up recovery.
+    if not database_breaker.allow():
+        raise ServiceUnavailableError(math.ceil(settings.CIRCUIT_BREAKER_RESET_SECONDS), "Database unavailable")
+
+
 def get_db():
+    _require_primary()
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def get_read_db():
+    """Session for read-only request paths, served by a replica when one is healthy."""
+    db = ReplicaSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    _require_primary()
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+async def get_async_read_db():
+    async with get_async_sessionmaker(replica=True)() as db:
+        yield db
@@ -61,4 +61,20 @@ class InvalidAliasError(HTTPException):
         super().__init__(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=detail
-        ) 
\ No newline at end of file
+        ) 
+
+class RateLimitedError(HTTPException):
+    def __init__(self, retry_after: int, detail: str = "Too many requests"):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)}
+        )
+
+class ServiceUnavailableError(HTTPException):
+    def __init__(self, retry_after: int, detail: str = "Service temporarily unavailable"):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)}
+        )
\ No newline at end of file
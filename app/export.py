@@ -0,0 +1,209 @@
+import argparse
+import io
+import json
+import sys
+from datetime import datetime
+from typing import Iterator, Optional
+
+from sqlalchemy import select, BigInteger, Integer, DateTime, JSON
+from sqlalchemy.orm import Session
+
+from .analytics import naive_utc
+from .config import get_settings
+from .database import SessionLocal
+from .models import Link, ClickEvent
+
+settings = get_settings()
+
+FORMATS = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+DATASETS = ("links", "click_events")
+
+
+class ExportUnavailable(RuntimeError):
+    """Raised when pyarrow is not installed."""
+
+
+def require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ExportUnavailable("Columnar export requires the pyarrow package")
+    return pyarrow
+
+
+def _arrow_type(pa, column):
+    column_type = column.type
+    if isinstance(column_type, (Integer, BigInteger)):
+        return pa.int64()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us")
+    # Strings as-is; JSON columns are exported as their serialized text
+    return pa.string()
+
+
+def _export_query(
+    dataset: str,
+    user_id: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None
+):
+    """Build the SELECT for a dataset with the filters pushed into SQL."""
+    if dataset == "links":
+        table = Link.__table__
+        query = select(table).order_by(table.c.created_at, table.c.id)
+        if user_id:
+            query = query.where(table.c.user_id == user_id)
+        time_column = table.c.created_at
+    elif dataset == "click_events":
+        table = ClickEvent.__table__
+        query = select(table).order_by(table.c.id)
+        if user_id:
+            owned = select(Link.short_code).where(Link.user_id == user_id)
+            query = query.where(table.c.short_code.in_(owned))
+        time_column = table.c.occurred_at
+    else:
+        raise ValueError(f"Unknown dataset: {dataset}")
+
+    # Stored timestamps are naive UTC, so aware bounds are converted first
+    if created_from:
+        query = query.where(time_column >= naive_utc(created_from))
+    if created_to:
+        query = query.where(time_column < naive_utc(created_to))
+    return table, query
+
+
+def iter_record_batches(db: Session, dataset: str, batch_size: Optional[int] = None, **filters):
+    """
+    Yield pyarrow RecordBatches for a dataset.
+
+    yield_per streams rows through a server-side cursor where the driver
+    supports it, so only one batch is held in memory at a time.
+    """
+    pa = require_pyarrow()
+    table, query = _export_query(dataset, **filters)
+    columns = list(table.columns)
+    schema = pa.schema([pa.field(column.name, _arrow_type(pa, column)) for column in columns])
+    json_columns = [i for i, column in enumerate(columns) if isinstance(column.type, JSON)]
+
+    result = db.execute(query.execution_options(yield_per=batch_size or settings.EXPORT_BATCH_SIZE))
+    yield schema
+    for rows in result.partitions():
+        arrays = [list(values) for values in zip(*rows)]
+        for i in json_columns:
+            arrays[i] = [None if value is None else json.dumps(value) for value in arrays[i]]
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(arrays, schema)],
+            schema=schema
+        )
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands buffered output back to a generator."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _open_writer(pa, fmt: str, sink, schema):
+    if fmt == "parquet":
+        return pa.parquet.ParquetWriter(sink, schema, compression="zstd")
+    if fmt == "arrow":
+        return pa.ipc.new_stream(sink, schema)
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+def write_export(db: Session, dataset: str, fmt: str, output, **filters) -> int:
+    """Write a dataset to a path or binary file object and return the row count."""
+    pa = require_pyarrow()
+    batches = iter_record_batches(db, dataset, **filters)
+    writer = _open_writer(pa, fmt, output, next(batches))
+    rows = 0
+    try:
+        for batch in batches:
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    finally:
+        writer.close()
+    return rows
+
+
+def stream_export(dataset: str, fmt: str, **filters) -> Iterator[bytes]:
+    """Encode a dataset batch by batch, yielding bytes as soon as each batch is written."""
+    pa = require_pyarrow()
+    db = SessionLocal()
+    sink = _ChunkSink()
+    try:
+        batches = iter_record_batches(db, dataset, **filters)
+        writer = _open_writer(pa, fmt, sink, next(batches))
+        try:
+            for batch in batches:
+                writer.write_batch(batch)
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+        finally:
+            writer.close()
+        yield sink.drain()
+    finally:
+        db.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Export links or click events as Parquet or Arrow IPC.")
+    parser.add_argument("dataset", choices=DATASETS)
+    parser.add_argument("--format", choices=sorted(FORMATS), default="parquet")
+    parser.add_argument("--output", "-o", required=True, help="Output file path, or - for stdout")
+    parser.add_argument("--user-id")
+    parser.add_argument("--created-from", type=datetime.fromisoformat)
+    parser.add_argument("--created-to", type=datetime.fromisoformat)
+    parser.add_argument("--batch-size", type=int, default=settings.EXPORT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    filters = dict(
+        user_id=args.user_id,
+        created_from=args.created_from,
+        created_to=args.created_to,
+        batch_size=args.batch_size
+    )
+    try:
+        if args.output == "-":
+            # Pipes are not seekable, so go through the chunked encoder
+            for chunk in stream_export(args.dataset, args.format, **filters):
+                sys.stdout.buffer.write(chunk)
+            return 0
+        db = SessionLocal()
+        try:
+            rows = write_export(db, args.dataset, args.format, args.output, **filters)
+        finally:
+            db.close()
+    except ExportUnavailable as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"Exported {rows} {args.dataset} rows", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from .config import get_settings
+from .metrics import PASSWORD_HASH_QUEUE_DEPTH
+
+settings = get_settings()
+
+# Pinning min and max rounds to the configured cost makes any hash created
+# with a different cost "need update", which triggers a rehash on login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS
+)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated bounded thread pool.
+
+    bcrypt releases the GIL while hashing, so a few threads keep the event
+    loop and the request threadpool free during login bursts. Work beyond
+    the pool size waits in the executor queue, tracked by queue_depth()
+    and exported as the password_hash_queue_depth gauge.
+    """
+
+    def __init__(self, workers: int):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def queue_depth(self) -> int:
+        """Number of hash/verify jobs submitted but not yet finished."""
+        return self._pending
+
+    def _submit(self, fn, *args):
+        with self._lock:
+            self._pending += 1
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, _future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def hash(self, password: str) -> str:
+        return self._submit(pwd_context.hash, password).result()
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return self._submit(pwd_context.verify, password, hashed).result()
+
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(pwd_context.hash, password))
+
+    async def verify_and_update_async(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password; also return a new hash if the stored one uses an outdated cost."""
+        return await asyncio.wrap_future(self._submit(pwd_context.verify_and_update, password, hashed))
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS)
+PASSWORD_HASH_QUEUE_DEPTH.set_function(password_hasher.queue_depth)
@@ -1,9 +1,111 @@
 import re
 import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, Tuple, Iterable, List
+from .config import get_settings
 from .exceptions import InvalidURLError, UnsafeURLError, InvalidAliasError
+from .probe import content_type_probe
+
+settings = get_settings()
+
+
+class UnsafePatternMatcher:
+    """
+    Single-pass matcher equivalent to trying each unsafe pattern in order.
+
+    Patterns of the form ``\\.(ext|ext|...)$`` made of literal
+    alternatives are folded into a suffix map, so lookups cost a few dict
+    probes on the URL's trailing extensions no matter how many rules are
+    loaded. Any other pattern is kept as a regex and checked through one
+    combined alternation. The first matching rule in list order is
+    reported, as the original loop did.
+    """
+
+    _EXTENSION_RULE = re.compile(r'^\\\.\(([^()\[\]{}]*)\)\$$')
+    _METACHARS = set('.^$*+?{}[]|()')
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = list(dict.fromkeys(patterns))
+        self._suffixes: Dict[str, int] = {}
+        self._regex_rules: List[Tuple[int, re.Pattern]] = []
+
+        for index, pattern in enumerate(self.patterns):
+            extensions = self._literal_extensions(pattern)
+            if extensions is None:
+                self._regex_rules.append((index, re.compile(pattern, re.IGNORECASE)))
+                continue
+            for ext in extensions:
+                self._suffixes.setdefault('.' + ext.lower(), index)
+
+        self._max_dots = max((suffix.count('.') for suffix in self._suffixes), default=0)
+        self._combined = None
+        if self._regex_rules:
+            try:
+                self._combined = re.compile(
+                    '|'.join(f'(?:{regex.pattern})' for _, regex in self._regex_rules),
+                    re.IGNORECASE
+                )
+            except re.error:
+                # Patterns with inline flags cannot be joined; check them one by one
+                self._combined = None
+
+    @classmethod
+    def _literal_extensions(cls, pattern: str) -> Optional[List[str]]:
+        """Return the literal alternatives of an extension rule, or None for other regexes."""
+        match = cls._EXTENSION_RULE.match(pattern)
+        if not match:
+            return None
+
+        extensions = []
+        for alternative in match.group(1).split('|'):
+            literal = []
+            i = 0
+            while i < len(alternative):
+                char = alternative[i]
+                if char == '\\':
+                    if alternative[i + 1:i + 2] != '.':
+                        return None
+                    literal.append('.')
+                    i += 2
+                    continue
+                if char in cls._METACHARS:
+                    return None
+                literal.append(char)
+                i += 1
+            extensions.append(''.join(literal))
+        return extensions
+
+    def match(self, url: str) -> Optional[str]:
+        """Return the first pattern matching the URL, or None."""
+        hits = []
+
+        # `$` also matches right before a trailing newline
+        text = (url[:-1] if url.endswith('\n') else url).lower()
+        end = len(text)
+        for _ in range(self._max_dots):
+            end = text.rfind('.', 0, end)
+            if end < 0:
+                break
+            index = self._suffixes.get(text[end:])
+            if index is not None:
+                hits.append(index)
+
+        if self._regex_rules and (self._combined is None or self._combined.search(url)):
+            for index, regex in self._regex_rules:
+                if regex.search(url):
+                    hits.append(index)
+                    break
+
+        return self.patterns[min(hits)] if hits else None
+
+
+def load_patterns(path: Optional[str]) -> List[str]:
+    """Read one regex per line from a rules file, skipping blanks and # comments."""
+    if not path:
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
 
 class LinkValidator:
     # List of unsafe URL patterns
@@ -71,6 +173,27 @@ class LinkValidator:
         '.csv', '.xml', '.json', '.yaml', '.yml', '.md', '.markdown'
     }
 
+    # Content types accepted for URLs without a safe extension
+    SAFE_CONTENT_TYPES = {
+        'text/html', 'text/plain', 'text/css', 'text/javascript',
+        'application/javascript', 'application/json', 'application/xml',
+        'image/jpeg', 'image/png', 'image/gif', 'image/svg+xml',
+        'application/pdf', 'application/msword', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+        'application/vnd.ms-excel', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        'application/vnd.ms-powerpoint', 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
+    }
+
+    _unsafe_matcher: Optional[UnsafePatternMatcher] = None
+
+    @classmethod
+    def unsafe_matcher(cls) -> UnsafePatternMatcher:
+        """Return the compiled matcher for the built-in and file-loaded unsafe patterns."""
+        if cls._unsafe_matcher is None:
+            cls._unsafe_matcher = UnsafePatternMatcher(
+                cls.UNSAFE_PATTERNS + load_patterns(settings.UNSAFE_PATTERNS_FILE)
+            )
+        return cls._unsafe_matcher
+
     @staticmethod
     def validate_url(url: str) -> bool:
         """Validate if the URL is properly formatted."""
@@ -90,9 +213,9 @@ class LinkValidator:
             raise InvalidURLError("Invalid URL format")
 
         # Check for unsafe patterns
-        for pattern in LinkValidator.UNSAFE_PATTERNS:
-            if re.search(pattern, url, re.IGNORECASE):
-                raise UnsafeURLError(f"URL contains unsafe pattern: {pattern}")
+        pattern = LinkValidator.unsafe_matcher().match(url)
+        if pattern is not None:
+            raise UnsafeURLError(f"URL contains unsafe pattern: {pattern}")
 
         # Check file extension
         parsed_url = urlparse(url)
@@ -101,23 +224,8 @@ class LinkValidator:
             return True
 
         # If no extension or not in safe list, check content type
-        try:
-            response = requests.head(url, timeout=5, allow_redirects=True)
-            content_type = response.headers.get('content-type', '').lower()
-            
-            # Check if content type is safe
-            safe_content_types = {
-                'text/html', 'text/plain', 'text/css', 'text/javascript',
-                'application/javascript', 'application/json', 'application/xml',
-                'image/jpeg', 'image/png', 'image/gif', 'image/svg+xml',
-                'application/pdf', 'application/msword', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                'application/vnd.ms-excel', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                'application/vnd.ms-powerpoint', 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
-            }
-            
-            return any(safe_type in content_type for safe_type in safe_content_types)
-        except Exception:
-            return False
+        content_type = content_type_probe.content_type(url)
+        return any(safe_type in content_type for safe_type in LinkValidator.SAFE_CONTENT_TYPES)
 
     @staticmethod
     def validate_alias(alias: str) -> bool:
@@ -136,37 +244,47 @@ class LinkValidator:
 
         return True
 
+    @staticmethod
+    def fetch_preview(url: str) -> Dict[str, str]:
+        """Fetch and parse preview information for a URL, raising on fetch errors."""
+        # Only the preview worker parses HTML, so BeautifulSoup is not imported up front
+        from bs4 import BeautifulSoup
+
+        response = requests.get(url, timeout=5, allow_redirects=True)
+        if response.status_code >= 500:
+            response.raise_for_status()
+        soup = BeautifulSoup(response.text, 'html.parser')
+        
+        # Extract title
+        title = soup.title.string if soup.title and soup.title.string else ''
+        
+        # Extract description
+        description = ''
+        meta_desc = soup.find('meta', attrs={'name': 'description'})
+        if meta_desc:
+            description = meta_desc.get('content', '')
+        elif soup.find('meta', attrs={'property': 'og:description'}):
+            description = soup.find('meta', attrs={'property': 'og:description'}).get('content', '')
+        
+        # Extract image
+        image = ''
+        og_image = soup.find('meta', attrs={'property': 'og:image'})
+        if og_image:
+            image = og_image.get('content', '')
+        elif soup.find('meta', attrs={'name': 'twitter:image'}):
+            image = soup.find('meta', attrs={'name': 'twitter:image'}).get('content', '')
+        
+        return {
+            'title': title.strip(),
+            'description': description.strip(),
+            'image': image.strip()
+        }
+
     @staticmethod
     def generate_preview(url: str) -> Dict[str, str]:
         """Generate preview information for a URL."""
         try:
-            response = requests.get(url, timeout=5, allow_redirects=True)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract title
-            title = soup.title.string if soup.title else ''
-            
-            # Extract description
-            description = ''
-            meta_desc = soup.find('meta', attrs={'name': 'description'})
-            if meta_desc:
-                description = meta_desc.get('content', '')
-            elif soup.find('meta', attrs={'property': 'og:description'}):
-                description = soup.find('meta', attrs={'property': 'og:description'}).get('content', '')
-            
-            # Extract image
-            image = ''
-            og_image = soup.find('meta', attrs={'property': 'og:image'})
-            if og_image:
-                image = og_image.get('content', '')
-            elif soup.find('meta', attrs={'name': 'twitter:image'}):
-                image = soup.find('meta', attrs={'name': 'twitter:image'}).get('content', '')
-            
-            return {
-                'title': title.strip(),
-                'description': description.strip(),
-                'image': image.strip()
-            }
+            return LinkValidator.fetch_preview(url)
         except Exception:
             return {
                 'title': '',
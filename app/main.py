@@ -1,21 +1,82 @@
-from fastapi import FastAPI, Request
+import logging
+import math
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from .routers import links, auth
-from .database import Base, engine
+from fastapi.responses import JSONResponse, ORJSONResponse
+from .routers import redirects
+from .database import dispose_engine, dispose_async_engine, replicas
+from .clicks import click_buffer
+from .analytics import click_event_log
+from .warmup import cache_warmer
+from .config import settings
 from .exceptions import (
     LinkNotFoundError,
     LinkExpiredError,
     CustomAliasTakenError,
     UnauthorizedError,
     InvalidCredentialsError,
-    UserExistsError
+    UserExistsError,
+    RateLimitedError,
+    ServiceUnavailableError
 )
+from .resilience import DATABASE_ERRORS, breaker_states
+
+# Redirect-only workers skip the API routers and with them the auth,
+# validation and preview stack (jose, passlib, requests, BeautifulSoup).
+FULL_MODE = settings.SERVICE_MODE != "redirect"
+
+if FULL_MODE:
+    from .routers import links, auth, admin
+    from .previews import preview_worker
+    from .sweeper import link_sweeper
+
+if settings.METRICS_ENABLED:
+    from .metrics import MetricsMiddleware, preallocate, render
+
+logger = logging.getLogger(__name__)
+
+
+def _shutdown_step(name, stop) -> None:
+    """Run one shutdown step, logging a failure so the remaining steps still run."""
+    try:
+        stop()
+    except Exception:
+        logger.exception("Shutdown step failed: %s", name)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The schema is managed by Alembic (`alembic upgrade head`), not created here
+    replicas.start()
+    click_buffer.start()
+    click_event_log.start()
+    if FULL_MODE:
+        preview_worker.start()
+        if settings.SWEEPER_ENABLED:
+            link_sweeper.start()
+    if settings.CACHE_WARMUP_ENABLED:
+        cache_warmer.start()
+    yield
+    _shutdown_step("cache warmer", cache_warmer.stop)
+    if FULL_MODE:
+        _shutdown_step("link sweeper", link_sweeper.stop)
+        _shutdown_step("preview worker", preview_worker.stop)
+    # Flush buffered clicks before the worker exits
+    _shutdown_step("click count flush", click_buffer.stop)
+    _shutdown_step("click event flush", click_event_log.stop)
+    _shutdown_step("replica monitor", replicas.stop)
+    try:
+        await dispose_async_engine()
+    except Exception:
+        logger.exception("Shutdown step failed: async engine")
+    _shutdown_step("engine", dispose_engine)
 
 app = FastAPI(
     title="URL Shortener API",
     description="A service for shortening URLs with analytics, authentication, and caching.",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -27,8 +88,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+if settings.METRICS_ENABLED:
+    # Added last so it is outermost and times the whole stack
+    app.add_middleware(MetricsMiddleware)
 
 # Exception handlers
 @app.exception_handler(LinkNotFoundError)
@@ -55,9 +117,54 @@ async def invalid_credentials_handler(request: Request, exc: InvalidCredentialsE
 async def user_exists_handler(request: Request, exc: UserExistsError):
     return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
 
+@app.exception_handler(RateLimitedError)
+async def rate_limited_handler(request: Request, exc: RateLimitedError):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail}, headers=exc.headers)
+
+@app.exception_handler(ServiceUnavailableError)
+async def service_unavailable_handler(request: Request, exc: ServiceUnavailableError):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail}, headers=exc.headers)
+
+async def database_unavailable_handler(request: Request, exc: Exception):
+    # Connection-level failures become a quick 503 rather than a 500
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database unavailable"},
+        headers={"Retry-After": str(math.ceil(settings.CIRCUIT_BREAKER_RESET_SECONDS))}
+    )
+
+for database_error in DATABASE_ERRORS:
+    app.add_exception_handler(database_error, database_unavailable_handler)
+
 # Include routers
-app.include_router(auth.router, prefix="", tags=["Auth"])
-app.include_router(links.router, prefix="", tags=["Links"])
+if FULL_MODE:
+    app.include_router(auth.router, prefix="", tags=["Auth"])
+    app.include_router(links.router, prefix="", tags=["Links"])
+    app.include_router(admin.router, prefix="", tags=["Admin"])
+
+@app.get("/health")
+async def health():
+    """Liveness plus dependency state; "degraded" while any circuit breaker is open."""
+    breakers = breaker_states()
+    return {
+        "status": "degraded" if any(state["state"] == "open" for state in breakers.values()) else "ok",
+        "breakers": breakers,
+        "pending_clicks": click_buffer.pending(),
+        "pending_click_events": click_event_log.pending(),
+    }
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        """Prometheus scrape endpoint."""
+        content, media_type = render()
+        return Response(content, media_type=media_type)
+
+# Registered last: its catch-all /{short_code} must not shadow GET /links
+if settings.REDIRECT_FAST_PATH:
+    app.router.routes.append(redirects.fast_route)
+else:
+    app.include_router(redirects.router, prefix="", tags=["Redirects"])
 
 @app.get("/")
 async def root():
@@ -67,4 +174,7 @@ async def root():
         "version": "1.0.0",
         "docs_url": "/docs",
         "redoc_url": "/redoc"
-    }
\ No newline at end of file
+    }
+
+if settings.METRICS_ENABLED:
+    preallocate(app.routes, (200, 404, settings.REDIRECT_STATUS_CODE))
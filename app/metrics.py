@@ -0,0 +1,201 @@
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest, disable_created_metrics
+from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily, REGISTRY
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# The *_created series double the scrape size and nothing here reads them
+disable_created_metrics()
+
+# Redirects are typically served from cache in well under a millisecond,
+# so the buckets start low.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency by route template", ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "http_request_db_queries", "Database statements executed per request", ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100)
+)
+DB_QUERY_SECONDS_PER_REQUEST = Histogram(
+    "http_request_db_seconds", "Time spent in database statements per request", ["route"],
+    buckets=LATENCY_BUCKETS
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "Duration of individual database statements", buckets=LATENCY_BUCKETS
+)
+LINK_CACHE_LOOKUPS = Counter(
+    "link_cache_lookups_total", "Redirect cache lookups by tier and result", ["tier", "result"]
+)
+PROBE_SECONDS = Histogram(
+    "content_type_probe_duration_seconds", "Validator HEAD probe latency", ["outcome"], buckets=LATENCY_BUCKETS
+)
+PREVIEW_FETCH_SECONDS = Histogram(
+    "preview_fetch_duration_seconds", "Preview fetch and parse latency", ["outcome"], buckets=LATENCY_BUCKETS
+)
+CLICK_FLUSH_SECONDS = Histogram(
+    "click_flush_duration_seconds", "Time to write one batch of buffered clicks", buckets=LATENCY_BUCKETS
+)
+CLICK_FLUSH_LAG_SECONDS = Gauge(
+    "click_flush_lag_seconds", "Age of the oldest click applied by the most recent flush"
+)
+RATE_LIMIT_CHECK_SECONDS = Histogram(
+    "rate_limit_check_duration_seconds", "Time spent in rate limit checks", ["backend"],
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total", "Requests rejected with 429 by route", ["route"]
+)
+CIRCUIT_BREAKER_OPEN = Gauge(
+    "circuit_breaker_open", "1 while the dependency's circuit breaker is open", ["dependency"]
+)
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    "password_hash_queue_depth", "bcrypt hash/verify jobs submitted and not yet finished"
+)
+DEGRADED_REDIRECTS = Counter(
+    "degraded_redirects_total", "Redirects served from stale local cache while the database was unavailable"
+)
+
+# Children are resolved once per label set and reused, so the hot path
+# does a dict lookup instead of prometheus_client's label validation.
+_request_children: Dict[Tuple[str, str, int], object] = {}
+_query_children: Dict[str, Tuple[object, object]] = {}
+
+CACHE_LOCAL_HIT = LINK_CACHE_LOOKUPS.labels("local", "hit")
+CACHE_LOCAL_MISS = LINK_CACHE_LOOKUPS.labels("local", "miss")
+CACHE_REDIS_HIT = LINK_CACHE_LOOKUPS.labels("redis", "hit")
+CACHE_REDIS_MISS = LINK_CACHE_LOOKUPS.labels("redis", "miss")
+PROBE_OK = PROBE_SECONDS.labels("ok")
+PROBE_ERROR = PROBE_SECONDS.labels("error")
+PREVIEW_OK = PREVIEW_FETCH_SECONDS.labels("ok")
+PREVIEW_ERROR = PREVIEW_FETCH_SECONDS.labels("error")
+
+# [statement count, seconds] for the request running in this context
+_request_queries: ContextVar[Optional[List]] = ContextVar("request_queries", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    DB_QUERY_SECONDS.observe(elapsed)
+    stats = _request_queries.get()
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += elapsed
+
+
+def _request_child(method: str, route: str, status: int):
+    key = (method, route, status)
+    child = _request_children.get(key)
+    if child is None:
+        child = _request_children[key] = HTTP_REQUEST_SECONDS.labels(method, route, str(status))
+    return child
+
+
+def _query_child(route: str):
+    children = _query_children.get(route)
+    if children is None:
+        children = _query_children[route] = (
+            DB_QUERIES_PER_REQUEST.labels(route), DB_QUERY_SECONDS_PER_REQUEST.labels(route)
+        )
+    return children
+
+
+def preallocate(routes, statuses=(200, 404)) -> None:
+    """Create the label sets for the app's routes up front so the first requests pay nothing extra."""
+    for route in routes:
+        methods = getattr(route, "methods", None) or ()
+        for method in methods:
+            for status in statuses:
+                _request_child(method, route.path, status)
+        _query_child(route.path)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency and per-request DB usage.
+
+    Requests are labelled by route template (e.g. /{short_code}), never by
+    raw path, so label cardinality stays bounded; unmatched paths share
+    one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        queries = [0, 0.0]
+        token = _request_queries.set(queries)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _request_queries.reset(token)
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            _request_child(scope["method"], path, status).observe(time.perf_counter() - started)
+            count_child, seconds_child = _query_child(path)
+            count_child.observe(queries[0])
+            seconds_child.observe(queries[1])
+
+
+class _PoolCollector:
+    """Exports the connection pool metrics from app.database at scrape time."""
+
+    @staticmethod
+    def _families():
+        return (
+            GaugeMetricFamily("db_pool_checked_out", "Connections currently checked out", labels=["engine"]),
+            GaugeMetricFamily("db_pool_overflow", "Connections open beyond pool_size", labels=["engine"]),
+            CounterMetricFamily("db_pool_checkout_timeouts", "Checkouts that hit pool_timeout", labels=["engine"]),
+        )
+
+    def describe(self):
+        # Lets the registry check names without importing app.database, which imports this module
+        return self._families()
+
+    def collect(self):
+        from .database import pool_stats
+
+        checked_out, overflow, timeouts = self._families()
+        for name, stats in pool_stats().items():
+            if "checked_out" in stats:
+                checked_out.add_metric([name], stats["checked_out"])
+                overflow.add_metric([name], stats["overflow"])
+            timeouts.add_metric([name], stats["checkout_timeouts"])
+        yield checked_out
+        yield overflow
+        yield timeouts
+
+
+REGISTRY.register(_PoolCollector())
+
+
+def render() -> Tuple[bytes, str]:
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
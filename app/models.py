@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, Text, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from .database import Base
 
@@ -14,7 +14,8 @@ class User(Base):
     password = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    links = relationship("Link", back_populates="user")
+    # Dynamic so that touching user.links never loads every row; use GET /links to page through them
+    links = relationship("Link", back_populates="user", lazy="dynamic")
 
 
 class Link(Base):
@@ -24,11 +25,67 @@ class Link(Base):
     short_code = Column(String(10), nullable=False, unique=True)
     custom_alias = Column(String(50), unique=True)
     original_url = Column(Text, nullable=False)
+    # Canonical form of original_url and a 64-bit hash of it for indexed lookups
+    normalized_url = Column(Text)
+    url_hash = Column(BigInteger, index=True)
     user_id = Column(String(36), ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
     click_count = Column(Integer, default=0)
     last_accessed = Column(DateTime)
+    expires_at = Column(DateTime, index=True)
+    preview = Column(JSON, nullable=True)
+
+    user = relationship("User", back_populates="links")
+
+    __table_args__ = (
+        Index("ix_links_user_created_id", "user_id", "created_at", "id"),
+    )
+
+
+class ArchivedLink(Base):
+    """Expired links moved out of the links table by the sweeper."""
+
+    __tablename__ = "archived_links"
+
+    id = Column(String(36), primary_key=True)
+    short_code = Column(String(10), nullable=False, index=True)
+    custom_alias = Column(String(50))
+    original_url = Column(Text, nullable=False)
+    normalized_url = Column(Text)
+    url_hash = Column(BigInteger)
+    user_id = Column(String(36))
+    created_at = Column(DateTime)
+    click_count = Column(Integer, default=0)
+    last_accessed = Column(DateTime)
     expires_at = Column(DateTime)
     preview = Column(JSON, nullable=True)
+    archived_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class ShortCodeCounter(Base):
+    __tablename__ = "short_code_counters"
+
+    name = Column(String(50), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+
+
+class ClickEvent(Base):
+    __tablename__ = "click_events"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    short_code = Column(String(50), nullable=False)
+    occurred_at = Column(DateTime, nullable=False)
+    referrer_host = Column(String(255))
+    ua_family = Column(String(32))
+    country = Column(String(2))
+
+    __table_args__ = (Index("ix_click_events_short_code_occurred_at", "short_code", "occurred_at"),)
+
+
+class ClickRollup(Base):
+    __tablename__ = "click_rollups"
 
-    user = relationship("User", back_populates="links")
\ No newline at end of file
+    short_code = Column(String(50), primary_key=True)
+    granularity = Column(String(8), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    clicks = Column(BigInteger, nullable=False, default=0)
\ No newline at end of file
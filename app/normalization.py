@@ -0,0 +1,53 @@
+import hashlib
+from typing import Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonicalize a URL for duplicate detection.
+
+    Lower-cases the scheme and host, drops default ports and a trailing
+    slash on the path, and sorts query parameters. Userinfo and fragment
+    are kept as-is. A URL that cannot be parsed, such as one with an
+    unclosed IPv6 bracket, is only stripped of surrounding whitespace.
+    """
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+
+    host = (parts.hostname or "").lower()
+    if ":" in host:
+        host = f"[{host}]"
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{port}"
+    if "@" in parts.netloc:
+        netloc = parts.netloc.rsplit("@", 1)[0] + "@" + netloc
+
+    path = parts.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/") or "/"
+
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, path, query, parts.fragment))
+
+
+def url_hash(normalized_url: str) -> int:
+    """Signed 64-bit prefix of the SHA-256 of a normalized URL, for a BIGINT index."""
+    digest = hashlib.sha256(normalized_url.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+def url_fingerprint(url: str) -> Tuple[str, int]:
+    normalized = normalize_url(url)
+    return normalized, url_hash(normalized)
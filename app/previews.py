@@ -0,0 +1,161 @@
+import logging
+import queue
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import select
+
+from .config import get_settings
+from .database import SessionLocal
+from .link_validator import LinkValidator
+from .models import Link
+from .metrics import PREVIEW_OK, PREVIEW_ERROR
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PREVIEW_PENDING = {"status": "pending"}
+
+
+class PreviewWorker:
+    """
+    Background pool that fetches link previews off the request path.
+
+    Links are stored with a pending preview and submitted here after
+    commit. A fixed number of threads bounds how many third-party sites
+    are fetched at once; failed fetches are retried with exponential
+    backoff before the preview is marked as failed.
+
+    The queue lives in memory, so start() re-queues previews a previous
+    run left pending. With several workers each one re-queues them; the
+    duplicate fetches store the same result.
+    """
+
+    def __init__(self, concurrency: int, max_attempts: int, backoff: float):
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._threads = []
+        self._resumer = None
+        self._timers = set()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def submit(self, link_id: str, url: str, attempt: int = 1) -> None:
+        """Queue a preview fetch for a link."""
+        if not self._stopping.is_set():
+            self._queue.put((link_id, url, attempt))
+
+    def _retry_later(self, link_id: str, url: str, attempt: int) -> None:
+        delay = self.backoff * 2 ** (attempt - 2)
+
+        def fire():
+            with self._lock:
+                self._timers.discard(timer)
+            self.submit(link_id, url, attempt)
+
+        timer = threading.Timer(delay, fire)
+        timer.daemon = True
+        with self._lock:
+            self._timers.add(timer)
+        timer.start()
+
+    @staticmethod
+    def _store(link_id: str, url: str, preview: Dict[str, str]) -> None:
+        db = SessionLocal()
+        try:
+            # The URL guard drops results for links whose target changed meanwhile
+            db.query(Link).filter(Link.id == link_id, Link.original_url == url).update(
+                {Link.preview: preview}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def process(self, link_id: str, url: str, attempt: int = 1) -> None:
+        """Fetch one preview, scheduling a retry or recording the outcome."""
+        started = time.perf_counter()
+        try:
+            preview = LinkValidator.fetch_preview(url)
+            PREVIEW_OK.observe(time.perf_counter() - started)
+        except Exception as e:
+            PREVIEW_ERROR.observe(time.perf_counter() - started)
+            if attempt < self.max_attempts and not self._stopping.is_set():
+                self._retry_later(link_id, url, attempt + 1)
+                return
+            logger.warning("Preview fetch for %s failed after %d attempts: %s", url, attempt, e)
+            preview = {"title": "", "description": "", "image": "", "status": "failed"}
+        else:
+            preview["status"] = "ready"
+        self._store(link_id, url, preview)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._stopping.is_set():
+                continue
+            try:
+                self.process(*item)
+            except Exception:
+                logger.exception("Failed to store preview for link %s", item[0])
+
+    def _resume_pending(self) -> None:
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(Link.id, Link.original_url)
+                .where(Link.preview["status"].as_string() == "pending")
+                .execution_options(yield_per=500)
+            )
+            resumed = 0
+            for link_id, url in rows:
+                if self._stopping.is_set():
+                    break
+                self.submit(link_id, url)
+                resumed += 1
+            if resumed:
+                logger.info("Re-queued %d pending previews", resumed)
+        except Exception:
+            logger.exception("Failed to re-queue pending previews")
+        finally:
+            db.close()
+
+    def start(self) -> None:
+        """Start the worker threads and re-queue previews left pending; returns immediately."""
+        if self._threads:
+            return
+        self._stopping.clear()
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._run, name=f"preview-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        # Off the startup path, like the cache warmer's first pass
+        self._resumer = threading.Thread(target=self._resume_pending, name="preview-resume", daemon=True)
+        self._resumer.start()
+
+    def stop(self) -> None:
+        """Stop the workers; previews still queued stay pending until the next start()."""
+        self._stopping.set()
+        with self._lock:
+            for timer in self._timers:
+                timer.cancel()
+            self._timers.clear()
+        if self._resumer is not None:
+            self._resumer.join()
+            self._resumer = None
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+
+preview_worker = PreviewWorker(
+    settings.PREVIEW_WORKER_CONCURRENCY,
+    settings.PREVIEW_MAX_ATTEMPTS,
+    settings.PREVIEW_RETRY_BACKOFF_SECONDS
+)
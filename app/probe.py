@@ -0,0 +1,72 @@
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .cache import LocalCache, SingleFlight
+from .config import get_settings
+from .metrics import PROBE_OK, PROBE_ERROR
+
+settings = get_settings()
+
+
+class ContentTypeProbe:
+    """
+    Shared HEAD prober used to classify URLs without a safe extension.
+
+    Requests go through one pooled session so repeated probes of a host
+    reuse keep-alive connections. Results are cached per URL, hosts that
+    fail to connect are remembered for a short while, and concurrent
+    probes of the same URL share a single request.
+    """
+
+    def __init__(self, timeout: float, pool_size: int, cache_size: int, ttl: float, failure_ttl: float):
+        self.timeout = timeout
+        self.failure_ttl = failure_ttl
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._results = LocalCache(cache_size, ttl)
+        self._dead_hosts = LocalCache(cache_size, failure_ttl)
+        self._inflight = SingleFlight()
+
+    def content_type(self, url: str) -> str:
+        """Return the lower-cased Content-Type of a URL, or "" if it could not be probed."""
+        cached = self._results.get(url)
+        if cached is not None:
+            return cached
+
+        host = urlparse(url).netloc.lower()
+        if self._dead_hosts.get(host):
+            return ""
+
+        return self._inflight.do(url, lambda: self._probe(url, host))
+
+    def _probe(self, url: str, host: str) -> str:
+        started = time.perf_counter()
+        try:
+            response = self.session.head(url, timeout=self.timeout, allow_redirects=True)
+        except (requests.ConnectionError, requests.Timeout):
+            PROBE_ERROR.observe(time.perf_counter() - started)
+            self._dead_hosts.set(host, True)
+            return ""
+        except Exception:
+            PROBE_ERROR.observe(time.perf_counter() - started)
+            self._results.set(url, "", ttl=self.failure_ttl)
+            return ""
+        PROBE_OK.observe(time.perf_counter() - started)
+
+        content_type = response.headers.get('content-type', '').lower()
+        self._results.set(url, content_type)
+        return content_type
+
+
+content_type_probe = ContentTypeProbe(
+    settings.PROBE_TIMEOUT_SECONDS,
+    settings.PROBE_POOL_SIZE,
+    settings.PROBE_CACHE_MAX_SIZE,
+    settings.PROBE_CACHE_TTL_SECONDS,
+    settings.PROBE_FAILURE_TTL_SECONDS
+)
@@ -0,0 +1,259 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from .config import get_settings
+from .exceptions import RateLimitedError
+from .metrics import RATE_LIMIT_CHECK_SECONDS, RATE_LIMIT_REJECTIONS
+from .redis_client import async_redis_client
+from .resilience import redis_breaker
+
+settings = get_settings()
+
+# A rule is (name, limit, window seconds); a check is a rule plus the identity it counts
+Rule = Tuple[str, int, int]
+
+
+def parse_rule(name: str, spec: str) -> Optional[Rule]:
+    """Parse "<count>/<seconds>"; an empty spec disables the rule."""
+    if not spec:
+        return None
+    count, _, seconds = spec.partition("/")
+    limit, window = int(count), int(seconds or 60)
+    if limit < 1 or window < 1:
+        raise ValueError(f"Invalid rate limit for {name}: {spec!r}")
+    return name, limit, window
+
+
+def retry_after(previous: int, current: int, limit: int, window: int, elapsed: float) -> float:
+    """
+    Seconds until one more hit fits under a sliding-window counter.
+
+    The estimate for the trailing window is the current fixed window's
+    count plus the previous window's count scaled by how much of it still
+    overlaps. 0 means the hit is allowed now. The Redis script below uses
+    the same formula.
+    """
+    if previous * (1 - elapsed / window) + current + 1 <= limit:
+        return 0.0
+    if current + 1 <= limit:
+        # The previous window's share decays linearly until this window ends
+        return window * (1 - (limit - 1 - current) / previous) - elapsed
+    # This window alone is full; after the rollover it becomes the decaying share
+    return (window - elapsed) + max(0.0, window * (1 - (limit - 1) / current))
+
+
+class MemoryLimiter:
+    """
+    Per-process sliding-window counters; exact for a single worker.
+
+    Counters live in an LRU map capped at max_keys, so memory stays bounded
+    however many client addresses show up. Each hit evicts at most a few
+    of the least recently used keys, which keeps every check O(1).
+    Expired counters are the least recently used, so they go first.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        # key -> [window index, current count, previous count]
+        self._counters: "OrderedDict[str, List[int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, checks: List[Tuple[Rule, str]], now: float, count: bool = True) -> float:
+        """
+        Count one hit against every check, or none if any would be exceeded; return the wait.
+
+        With count=False nothing is counted, so a caller can ask whether
+        one more hit would be allowed and record it later.
+        """
+        with self._lock:
+            wait = 0.0
+            counters = []
+            for (name, limit, window), identity in checks:
+                index = int(now // window)
+                key = f"{name}:{window}:{identity}"
+                counter = self._counters.get(key)
+                if counter is None or counter[0] < index - 1:
+                    counter = self._counters[key] = [index, 0, 0]
+                elif counter[0] == index - 1:
+                    counter[:] = [index, 0, counter[1]]
+                self._counters.move_to_end(key)
+                wait = max(wait, retry_after(counter[2], counter[1], limit, window, now - index * window))
+                counters.append(counter)
+            if count and not wait:
+                for counter in counters:
+                    counter[1] += 1
+            while len(self._counters) > self.max_keys:
+                self._counters.popitem(last=False)
+            return wait
+
+
+# Checks every rule and only counts the hit if all of them allow it, in one
+# round-trip. KEYS are per-rule prefixes; ARGV is now, 1 to count or 0 to
+# only check, then limit and window for each key. Returns the wait in
+# seconds as a string (Lua numbers would be truncated to integers).
+_SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local wait = 0
+local current_keys = {}
+for i = 1, #KEYS do
+    local limit = tonumber(ARGV[2 * i + 1])
+    local window = tonumber(ARGV[2 * i + 2])
+    local index = math.floor(now / window)
+    local elapsed = now - index * window
+    local current_key = KEYS[i] .. ":" .. index
+    local current = tonumber(redis.call("GET", current_key) or "0")
+    local previous = tonumber(redis.call("GET", KEYS[i] .. ":" .. (index - 1)) or "0")
+    local rule_wait = 0
+    if previous * (1 - elapsed / window) + current + 1 > limit then
+        if current + 1 <= limit then
+            rule_wait = window * (1 - (limit - 1 - current) / previous) - elapsed
+        else
+            rule_wait = (window - elapsed) + math.max(0, window * (1 - (limit - 1) / current))
+        end
+    end
+    if rule_wait > wait then
+        wait = rule_wait
+    end
+    current_keys[i] = current_key
+end
+if wait > 0 or ARGV[2] == "0" then
+    return tostring(wait)
+end
+for i = 1, #KEYS do
+    redis.call("INCR", current_keys[i])
+    redis.call("EXPIRE", current_keys[i], 2 * tonumber(ARGV[2 * i + 2]))
+end
+return "0"
+"""
+
+
+class RedisLimiter:
+    """
+    Sliding-window counters shared by every worker through Redis.
+
+    All rules for a request are checked and counted atomically by one Lua
+    script call. If Redis is unreachable, or redis_breaker is open, the
+    check falls back to the in-process counters rather than failing the
+    request.
+    """
+
+    def __init__(self, client, fallback: MemoryLimiter, prefix: str = "ratelimit:"):
+        self.client = client
+        self.fallback = fallback
+        self.prefix = prefix
+        self._script = client.register_script(_SLIDING_WINDOW_SCRIPT)
+
+    async def hit(self, checks: List[Tuple[Rule, str]], now: float, count: bool = True) -> float:
+        keys = [f"{self.prefix}{name}:{window}:{identity}" for (name, _, window), identity in checks]
+        args = [now, int(count)]
+        for (_, limit, window), _ in checks:
+            args += [limit, window]
+        wait = await redis_breaker.acall(lambda: self._script(keys=keys, args=args))
+        if wait is None:
+            return self.fallback.hit(checks, now, count)
+        return float(wait)
+
+
+class RateLimiter:
+    """
+    Per-route limits keyed by client IP, user id or attempted username.
+
+    Routes call enforce() with whichever identities they know; a rule
+    with no identity for the request is skipped. Username rules count
+    failures only: check_failures() rejects once the limit is reached and
+    record_failure() counts a failed attempt, so successful logins never
+    lock an account. Rejections raise RateLimitedError (429) with a
+    Retry-After header.
+    """
+
+    def __init__(self, enabled: bool, backend: str, rules: Dict[str, Rule], trust_forwarded_for: bool):
+        self.enabled = enabled
+        self.backend = backend
+        self.rules = rules
+        self.trust_forwarded_for = trust_forwarded_for
+        self.memory = MemoryLimiter()
+        self.redis = RedisLimiter(async_redis_client, self.memory) if backend == "redis" else None
+        self._timer = RATE_LIMIT_CHECK_SECONDS.labels(backend)
+
+    def client_ip(self, request) -> Optional[str]:
+        if self.trust_forwarded_for:
+            forwarded = request.headers.get("x-forwarded-for")
+            if forwarded:
+                return forwarded.split(",")[0].strip()
+        return request.client.host if request.client else None
+
+    async def _wait(self, checks: List[Tuple[Rule, str]], count: bool = True) -> float:
+        started = time.perf_counter()
+        now = time.time()
+        if self.redis is not None:
+            wait = await self.redis.hit(checks, now, count)
+        else:
+            wait = self.memory.hit(checks, now, count)
+        self._timer.observe(time.perf_counter() - started)
+        return wait
+
+    async def _hit(self, route: str, checks: List[Tuple[Rule, str]], count: bool = True) -> None:
+        wait = await self._wait(checks, count)
+        if wait > 0:
+            RATE_LIMIT_REJECTIONS.labels(route).inc()
+            raise RateLimitedError(retry_after=max(1, math.ceil(wait)))
+
+    async def enforce(self, route: str, request, user_id: Optional[str] = None) -> None:
+        if not self.enabled:
+            return
+        identities = {"ip": self.client_ip(request), "user": user_id}
+        checks = []
+        for kind, identity in identities.items():
+            rule = self.rules.get(f"{route}:{kind}")
+            if rule is not None and identity:
+                checks.append((rule, identity))
+        if checks:
+            await self._hit(route, checks)
+
+    def _failure_check(self, route: str, username: str) -> Optional[Tuple[Rule, str]]:
+        rule = self.rules.get(f"{route}:username")
+        if not self.enabled or rule is None or not username:
+            return None
+        return rule, username
+
+    async def check_failures(self, route: str, username: str) -> None:
+        """Reject if the username already has as many failed attempts as its rule allows."""
+        check = self._failure_check(route, username)
+        if check is not None:
+            await self._hit(route, [check], count=False)
+
+    async def record_failure(self, route: str, username: str) -> None:
+        """Count one failed attempt against the username."""
+        check = self._failure_check(route, username)
+        if check is not None:
+            # Not counted if concurrent failures already reached the limit; the next attempt is rejected either way
+            await self._wait([check])
+
+
+def _rules() -> Dict[str, Rule]:
+    specs = {
+        "shorten:ip": settings.RATE_LIMIT_SHORTEN_PER_IP,
+        "shorten:user": settings.RATE_LIMIT_SHORTEN_PER_USER,
+        "bulk:ip": settings.RATE_LIMIT_BULK_PER_IP,
+        "bulk:user": settings.RATE_LIMIT_BULK_PER_USER,
+        "login:ip": settings.RATE_LIMIT_LOGIN_PER_IP,
+        "login:username": settings.RATE_LIMIT_LOGIN_PER_USERNAME,
+        "register:ip": settings.RATE_LIMIT_REGISTER_PER_IP,
+    }
+    rules = {}
+    for name, spec in specs.items():
+        rule = parse_rule(name, spec)
+        if rule is not None:
+            rules[name] = rule
+    return rules
+
+
+rate_limiter = RateLimiter(
+    settings.RATE_LIMIT_ENABLED,
+    settings.RATE_LIMIT_BACKEND,
+    _rules(),
+    settings.RATE_LIMIT_TRUST_FORWARDED_FOR
+)
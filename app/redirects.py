@@ -0,0 +1,192 @@
+import math
+from datetime import datetime
+from typing import Any, Optional
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .analytics import click_event_log
+from .cache import link_cache, CachedLink, MISSING, SingleFlight, AsyncSingleFlight
+from .clicks import click_buffer
+from .consistency import read_your_writes
+from .config import settings
+from .database import SessionLocal, ReplicaSessionLocal, get_async_sessionmaker
+from .exceptions import ServiceUnavailableError
+from .metrics import DEGRADED_REDIRECTS
+from .models import Link
+from .resilience import DATABASE_ERRORS, database_breaker
+
+# Kept free of the auth, validation and preview stack (jose, passlib,
+# requests, BeautifulSoup) so redirect-only workers never import it.
+
+# Concurrent misses on one short code share a single database lookup
+link_loads = SingleFlight()
+async_link_loads = AsyncSingleFlight()
+
+
+class RedirectService:
+    """
+    Short code resolution for GET /{short_code}.
+
+    Lookups read through the link cache. When the database is unreachable,
+    or its circuit breaker is open, a miss falls back to the local cache
+    entry even past its TTL (up to LINK_CACHE_STALE_SECONDS), so hot links
+    keep redirecting; clicks keep accumulating in the buffers and are
+    written once the database is back.
+    """
+
+    @staticmethod
+    def _serve_stale(short_code: str) -> Any:
+        cached = link_cache.local.get_stale(short_code, settings.LINK_CACHE_STALE_SECONDS)
+        if cached is None:
+            raise ServiceUnavailableError(math.ceil(settings.CIRCUIT_BREAKER_RESET_SECONDS), "Link store unavailable")
+        DEGRADED_REDIRECTS.inc()
+        return cached
+
+    @staticmethod
+    def _check_resolved(cached) -> CachedLink:
+        if cached is MISSING:
+            raise HTTPException(status_code=404, detail="Link not found")
+
+        if cached.expires_at and cached.expires_at < datetime.utcnow():
+            raise HTTPException(status_code=410, detail="Link has expired")
+
+        return cached
+
+    @staticmethod
+    def resolve_link(db: Session, short_code: str) -> CachedLink:
+        """Resolve a short code for redirection, reading through the link cache."""
+        cached = link_cache.get(short_code)
+        if cached is None:
+            if database_breaker.allow():
+                cached = RedirectService._load_or_stale(db, short_code)
+            else:
+                cached = RedirectService._serve_stale(short_code)
+
+        return RedirectService._check_resolved(cached)
+
+    @staticmethod
+    def _load_or_stale(db: Session, short_code: str) -> Any:
+        # Callers check database_breaker first; allow() hands out the breaker's trial calls
+        try:
+            return link_loads.do(short_code, lambda: RedirectService._load_link(db, short_code))
+        except DATABASE_ERRORS:
+            return RedirectService._serve_stale(short_code)
+
+    @staticmethod
+    async def _aload_or_stale(db: AsyncSession, short_code: str) -> Any:
+        try:
+            return await async_link_loads.do(short_code, lambda: RedirectService._load_link_async(db, short_code))
+        except DATABASE_ERRORS:
+            return RedirectService._serve_stale(short_code)
+
+    @staticmethod
+    async def resolve_link_fast(short_code: str) -> CachedLink:
+        """
+        Resolve without a request-scoped session for the fast redirect route.
+
+        Cache hits never touch the database or the threadpool; a miss opens
+        its own session, on the asyncio engine when ASYNC_REDIRECTS is set.
+        """
+        cached = await link_cache.aget(short_code)
+        if cached is None:
+            if not database_breaker.allow():
+                cached = RedirectService._serve_stale(short_code)
+            elif settings.ASYNC_REDIRECTS:
+                async with get_async_sessionmaker(replica=True)() as db:
+                    cached = await RedirectService._aload_or_stale(db, short_code)
+            else:
+                cached = await run_in_threadpool(RedirectService._load_link_in_session, short_code)
+
+        return RedirectService._check_resolved(cached)
+
+    @staticmethod
+    def _load_link_in_session(short_code: str) -> Any:
+        with ReplicaSessionLocal() as db:
+            return RedirectService._load_or_stale(db, short_code)
+
+    @staticmethod
+    def _fetch_link(db: Session, short_code: str):
+        return db.query(Link.original_url, Link.expires_at).filter(Link.short_code == short_code).first()
+
+    @staticmethod
+    def _load_link(db: Session, short_code: str) -> Any:
+        # A load that finished just before we took ownership has already filled the local tier
+        cached = link_cache.local.get(short_code)
+        if cached is not None:
+            return cached
+        # Taken before the read, so an update committed meanwhile is not cached from the old row
+        since = link_cache.epoch()
+        on_replica = db.info.get("replica")
+        row = None
+        if not (on_replica and read_your_writes.code_is_sticky(short_code)):
+            row = RedirectService._fetch_link(db, short_code)
+        if row is None and on_replica:
+            # Recently written or not replicated yet is not the same as missing; ask the primary
+            with SessionLocal() as primary:
+                row = RedirectService._fetch_link(primary, short_code)
+        if row is None:
+            link_cache.set_missing(short_code, since)
+            return MISSING
+        cached = CachedLink(row.original_url, row.expires_at)
+        link_cache.set(short_code, cached, since)
+        return cached
+
+    @staticmethod
+    async def resolve_link_async(db: AsyncSession, short_code: str) -> CachedLink:
+        """Async variant of resolve_link using the asyncio engine and Redis client."""
+        cached = await link_cache.aget(short_code)
+        if cached is None:
+            if database_breaker.allow():
+                cached = await RedirectService._aload_or_stale(db, short_code)
+            else:
+                cached = RedirectService._serve_stale(short_code)
+
+        return RedirectService._check_resolved(cached)
+
+    @staticmethod
+    async def _fetch_link_async(db: AsyncSession, short_code: str):
+        result = await db.execute(
+            select(Link.original_url, Link.expires_at).where(Link.short_code == short_code)
+        )
+        return result.first()
+
+    @staticmethod
+    async def _load_link_async(db: AsyncSession, short_code: str) -> Any:
+        cached = link_cache.local.get(short_code)
+        if cached is not None:
+            return cached
+        since = await link_cache.aepoch()
+        on_replica = db.info.get("replica")
+        row = None
+        if not (on_replica and await read_your_writes.acode_is_sticky(short_code)):
+            row = await RedirectService._fetch_link_async(db, short_code)
+        if row is None and on_replica:
+            async with get_async_sessionmaker()() as primary:
+                row = await RedirectService._fetch_link_async(primary, short_code)
+        if row is None:
+            await link_cache.aset_missing(short_code, since)
+            return MISSING
+        cached = CachedLink(row.original_url, row.expires_at)
+        await link_cache.aset(short_code, cached, since)
+        return cached
+
+    @staticmethod
+    def increment_click_count(short_code: str) -> None:
+        # Only touches the in-memory buffer, so it is safe to call from async handlers too
+        click_buffer.record(short_code)
+
+    @staticmethod
+    def record_click(
+        short_code: str,
+        referrer: Optional[str] = None,
+        user_agent: Optional[str] = None,
+        ip: Optional[str] = None
+    ) -> None:
+        """Count a redirect and append it to the click event log."""
+        RedirectService.increment_click_count(short_code)
+        if settings.CLICK_EVENTS_ENABLED:
+            click_event_log.record(short_code, referrer, user_agent, ip)
@@ -1,14 +1,21 @@
 import redis
+import redis.asyncio
 from .config import get_settings
 
 settings = get_settings()
 
-redis_client = redis.Redis(
-    host=settings.REDIS_HOST,
-    port=settings.REDIS_PORT,
-    db=settings.REDIS_DB,
+redis_client = redis.Redis.from_url(
+    settings.REDIS_URL,
     decode_responses=True,
-    socket_timeout=5,
-    socket_connect_timeout=5,
-    retry_on_timeout=True
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+    socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+    retry_on_timeout=False
+)
+
+async_redis_client = redis.asyncio.Redis.from_url(
+    settings.REDIS_URL,
+    decode_responses=True,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+    socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+    retry_on_timeout=False
 )
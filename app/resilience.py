@@ -0,0 +1,173 @@
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+import redis
+from sqlalchemy.exc import DisconnectionError, InterfaceError, OperationalError, TimeoutError as PoolTimeoutError
+
+from .config import get_settings
+from .metrics import CIRCUIT_BREAKER_OPEN
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Errors that mean the database is unreachable rather than that a query was wrong
+DATABASE_ERRORS = (OperationalError, InterfaceError, DisconnectionError, PoolTimeoutError)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one dependency.
+
+    After failure_threshold failures in a row the breaker opens and
+    allow() returns False, so callers skip the dependency instead of
+    waiting on it. While open, one call every reset_timeout seconds is let
+    through as a trial: a success closes the breaker, a failure keeps it
+    open for another period.
+
+    With a probe, trials are not handed to callers at all, since a caller
+    that is allowed through may never reach the dependency and the trial
+    would be wasted. A background thread runs the probe every
+    reset_timeout seconds instead, until one succeeds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        errors: Tuple[Type[BaseException], ...],
+        probe: Optional[Callable[[], Any]] = None
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.errors = errors
+        self.probe = probe
+        self.failures = 0
+        self.rejected = 0
+        self.opened_at: Optional[float] = None
+        self._next_trial = 0.0
+        self._prober: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._gauge = CIRCUIT_BREAKER_OPEN.labels(name)
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            now = time.monotonic()
+            if self.probe is None and now >= self._next_trial:
+                self._next_trial = now + self.reset_timeout
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        if not self.failures and self.opened_at is None:
+            return
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info("%s circuit closed after %.1fs", self.name, time.monotonic() - self.opened_at)
+                self._gauge.set(0)
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            now = time.monotonic()
+            if self.opened_at is not None:
+                # A failed trial waits out another full period
+                self._next_trial = now + self.reset_timeout
+            elif self.failures >= self.failure_threshold:
+                logger.warning("%s circuit opened after %d consecutive failures", self.name, self.failures)
+                self.opened_at = now
+                self._next_trial = now + self.reset_timeout
+                self._gauge.set(1)
+                if self.probe is not None and self._prober is None:
+                    self._prober = threading.Thread(target=self._run_probes, name=f"{self.name}-probe", daemon=True)
+                    self._prober.start()
+
+    def _run_probes(self) -> None:
+        while True:
+            with self._lock:
+                # Cleared under the lock, so a breaker that reopens afterwards starts a new prober
+                if self.opened_at is None:
+                    self._prober = None
+                    return
+                delay = self._next_trial - time.monotonic()
+                if delay <= 0:
+                    self._next_trial = time.monotonic() + self.reset_timeout
+            if delay > 0:
+                time.sleep(delay)
+                continue
+            try:
+                self.probe()
+            except Exception as e:
+                logger.debug("%s probe failed: %s", self.name, e)
+                self.record_failure()
+            else:
+                self.record_success()
+
+    def call(self, fn: Callable[[], Any], default: Any = None) -> Any:
+        """Run fn unless the breaker is open; return default when skipped or on one of its errors."""
+        if not self.allow():
+            return default
+        try:
+            result = fn()
+        except self.errors:
+            self.record_failure()
+            return default
+        self.record_success()
+        return result
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]], default: Any = None) -> Any:
+        """Async variant of call()."""
+        if not self.allow():
+            return default
+        try:
+            result = await fn()
+        except self.errors:
+            self.record_failure()
+            return default
+        self.record_success()
+        return result
+
+    def snapshot(self) -> dict:
+        opened_at = self.opened_at
+        now = time.monotonic()
+        return {
+            "state": "open" if opened_at is not None else "closed",
+            "consecutive_failures": self.failures,
+            "rejected_calls": self.rejected,
+            "open_seconds": round(now - opened_at, 1) if opened_at is not None else None,
+            "next_trial_seconds": round(max(0.0, self._next_trial - now), 1) if opened_at is not None else None,
+        }
+
+
+redis_breaker = CircuitBreaker(
+    "redis",
+    settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    settings.CIRCUIT_BREAKER_RESET_SECONDS,
+    (redis.RedisError,)
+)
+# Fed by engine events on the primary, so every query counts; app.database
+# also installs its SELECT 1 probe
+database_breaker = CircuitBreaker(
+    "database",
+    settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    settings.CIRCUIT_BREAKER_RESET_SECONDS,
+    DATABASE_ERRORS
+)
+
+
+def breaker_states() -> Dict[str, dict]:
+    return {breaker.name: breaker.snapshot() for breaker in (database_breaker, redis_breaker)}
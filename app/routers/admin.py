@@ -0,0 +1,71 @@
+from datetime import datetime
+from typing import Optional, Literal
+from fastapi import APIRouter, Depends, HTTPException, Security
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..database import get_db, pool_stats
+from ..exceptions import UnauthorizedError
+from ..export import FORMATS, ExportUnavailable, stream_export, require_pyarrow
+from ..services import AuthService
+from ..sweeper import link_sweeper
+
+router = APIRouter()
+security = HTTPBearer()
+
+async def _require_admin(credentials: HTTPAuthorizationCredentials, db: Session):
+    user = await AuthService.get_current_user(token=credentials.credentials, db=db)
+    if user.username not in settings.ADMIN_USERNAMES:
+        raise UnauthorizedError()
+    return user
+
+@router.get("/admin/export/{dataset}")
+async def export_dataset(
+    dataset: Literal["links", "click_events"],
+    format: Literal["parquet", "arrow"] = "parquet",
+    user_id: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    credentials: HTTPAuthorizationCredentials = Security(security),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream links or click events as Parquet or Arrow IPC.
+
+    `user_id`, `created_from` and `created_to` are applied in SQL; for
+    click events the time range filters on when the click happened.
+    Only users listed in ADMIN_USERNAMES may call this endpoint.
+    """
+    await _require_admin(credentials, db)
+    try:
+        require_pyarrow()
+    except ExportUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+    extension = "parquet" if format == "parquet" else "arrows"
+    return StreamingResponse(
+        stream_export(dataset, format, user_id=user_id, created_from=created_from, created_to=created_to),
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{extension}"'}
+    )
+
+
+@router.get("/admin/sweeper")
+async def sweeper_stats(
+    credentials: HTTPAuthorizationCredentials = Security(security),
+    db: Session = Depends(get_db)
+):
+    """Expired-link sweeper throughput: totals and the last run."""
+    await _require_admin(credentials, db)
+    return link_sweeper.stats()
+
+
+@router.get("/admin/pool")
+async def database_pool_stats(
+    credentials: HTTPAuthorizationCredentials = Security(security),
+    db: Session = Depends(get_db)
+):
+    """Connection pool metrics per engine: checkout wait, usage, overflow and connection lifetime."""
+    await _require_admin(credentials, db)
+    return pool_stats()
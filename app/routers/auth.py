@@ -1,26 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Request
 from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from ..database import get_db
+from ..ratelimit import rate_limiter
 from ..schemas import UserCreate, Token, LoginData
 from ..services import AuthService
 
 router = APIRouter()
 
 @router.post("/auth/register")
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, request: Request, db: Session = Depends(get_db)):
     """Register a new user."""
-    AuthService.create_user(db, user)
+    await rate_limiter.enforce("register", request)
+    # Hashing is CPU-bound, so it stays off the event loop
+    await run_in_threadpool(AuthService.create_user, db, user)
     return {"msg": "User created successfully"}
 
 @router.post("/auth/login", response_model=Token)
 async def login(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
     """Login user and return access token."""
-    user = AuthService.authenticate_user(db, form_data.username, form_data.password)
+    # Checked before the bcrypt verify so rejected attempts cost almost nothing
+    await rate_limiter.enforce("login", request)
+    await rate_limiter.check_failures("login", form_data.username)
+    user = await AuthService.authenticate_user(db, form_data.username, form_data.password)
     if not user:
+        await rate_limiter.record_failure("login", form_data.username)
         raise HTTPException(
             status_code=401,
             detail="Incorrect username or password"
@@ -32,11 +41,15 @@ async def login(
 @router.post("/auth/login/json", response_model=Token)
 async def login_json(
     login_data: LoginData,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """Login user with JSON data and return access token."""
-    user = AuthService.authenticate_user(db, login_data.username, login_data.password)
+    await rate_limiter.enforce("login", request)
+    await rate_limiter.check_failures("login", login_data.username)
+    user = await AuthService.authenticate_user(db, login_data.username, login_data.password)
     if not user:
+        await rate_limiter.record_failure("login", login_data.username)
         raise HTTPException(
             status_code=401,
             detail="Incorrect username or password"
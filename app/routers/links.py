@@ -1,10 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, Security
+import json
+import orjson
+from datetime import datetime
+from typing import Optional, Literal
+from fastapi import APIRouter, Depends, HTTPException, Security, Request, Query
 from sqlalchemy.orm import Session
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, StreamingResponse, ORJSONResponse
+from pydantic import ValidationError
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from ..database import get_db
+from ..analytics import naive_utc
+from ..config import settings
+from ..database import get_db, get_read_db, read_session, SessionLocal
+from ..consistency import read_your_writes
+from ..ratelimit import rate_limiter
 from ..models import User
-from ..schemas import LinkCreate, LinkUpdate, LinkInfo
+from ..schemas import LinkCreate, LinkUpdate, LinkInfo, LinkStats, LinkPage
+from ..serialization import link_serializer, link_columns, parse_fields, serialize_link
 from ..services import LinkService, AuthService
 
 router = APIRouter()
@@ -13,6 +24,7 @@ security = HTTPBearer()
 @router.post("/links/shorten", response_model=LinkInfo)
 async def create_short_link(
     link: LinkCreate,
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Security(security),
     db: Session = Depends(get_db)
 ):
@@ -26,24 +38,153 @@ async def create_short_link(
     ```
     """
     user = await AuthService.get_current_user(token=credentials.credentials, db=db)
-    return LinkService.create_link(db, link, user)
+    await rate_limiter.enforce("shorten", request, user_id=user.id)
+    # Validation may probe the target URL, so keep it off the event loop
+    created = await run_in_threadpool(LinkService.create_link, db, link, user)
+    return ORJSONResponse(serialize_link(created))
 
-@router.get("/{short_code}")
-def redirect_link(short_code: str, db: Session = Depends(get_db)):
-    """Get the original URL for redirection."""
-    link = LinkService.get_link(db, short_code)
-    LinkService.increment_click_count(db, link)
-    
-    # Ensure the URL has a proper scheme
-    url = link.original_url
-    if not url.startswith(('http://', 'https://')):
-        url = 'https://' + url
-    
-    return {
-        "original_url": url,
-        "short_code": link.short_code,
-        "click_count": link.click_count
-    }
+def _body_too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Body is larger than {settings.BULK_MAX_BODY_BYTES} bytes")
+
+async def _capped_stream(request: Request):
+    """Yield the request body in chunks, refusing it once it exceeds BULK_MAX_BODY_BYTES."""
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > settings.BULK_MAX_BODY_BYTES:
+        raise _body_too_large()
+    received = 0
+    async for chunk in request.stream():
+        # Content-Length may be absent (chunked) or understated, so count what actually arrives
+        received += len(chunk)
+        if received > settings.BULK_MAX_BODY_BYTES:
+            raise _body_too_large()
+        yield chunk
+
+async def _ndjson_lines(request: Request):
+    """Yield non-empty lines from a streamed NDJSON request body."""
+    buffer = b""
+    async for chunk in _capped_stream(request):
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+def _bulk_line(result: dict) -> str:
+    return json.dumps(result) + "\n"
+
+@router.post("/links/bulk")
+async def create_links_bulk(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Security(security),
+    db: Session = Depends(get_db)
+):
+    """
+    Create many short links at once.
+
+    Accepts a JSON array of link objects or an NDJSON stream
+    (`Content-Type: application/x-ndjson`). Results are streamed back as
+    NDJSON, one line per input item with its `index` and either the new
+    `short_code` or an `error`. Items with `reuse_existing` get the
+    caller's existing link to the same URL when there is one.
+
+    Requires authentication token in the Authorization header.
+    """
+    user = await AuthService.get_current_user(token=credentials.credentials, db=db)
+    await rate_limiter.enforce("bulk", request, user_id=user.id)
+
+    # The body has to be read before streaming starts: StreamingResponse
+    # listens on the same channel for client disconnects.
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        items = [line async for line in _ndjson_lines(request)]
+    else:
+        body = b"".join([chunk async for chunk in _capped_stream(request)])
+        try:
+            items = json.loads(body)
+        except ValueError:
+            items = None
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+
+    async def results():
+        # The request-scoped session is already closed while the response streams
+        bulk_db = SessionLocal()
+        try:
+            batch, index = [], 0
+            for raw in items:
+                if index >= settings.BULK_MAX_ITEMS:
+                    yield _bulk_line({"index": index, "error": "Too many items in one request"})
+                    break
+                try:
+                    data = json.loads(raw) if isinstance(raw, bytes) else raw
+                    batch.append((index, LinkCreate.model_validate(data)))
+                except (ValueError, ValidationError) as e:
+                    yield _bulk_line({"index": index, "error": str(e)})
+                index += 1
+
+                if len(batch) >= settings.BULK_CHUNK_SIZE:
+                    for result in await run_in_threadpool(LinkService.create_links_bulk, bulk_db, batch, user):
+                        yield _bulk_line(result)
+                    batch = []
+
+            if batch:
+                for result in await run_in_threadpool(LinkService.create_links_bulk, bulk_db, batch, user):
+                    yield _bulk_line(result)
+        finally:
+            bulk_db.close()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+@router.get("/links", response_model=LinkPage)
+async def list_links(
+    limit: int = Query(settings.LINKS_PAGE_DEFAULT_SIZE, ge=1, le=settings.LINKS_PAGE_MAX_SIZE),
+    cursor: Optional[str] = None,
+    expired: Optional[bool] = None,
+    has_preview: Optional[bool] = None,
+    min_clicks: Optional[int] = Query(None, ge=0),
+    fields: Optional[str] = None,
+    credentials: HTTPAuthorizationCredentials = Security(security),
+    db: Session = Depends(get_db)
+):
+    """
+    List the current user's links, newest first.
+
+    Pass the returned `next_cursor` back as `cursor` to get the next page;
+    it is null on the last page. Optional filters: `expired`,
+    `has_preview` (preview fetched successfully) and `min_clicks`.
+    `fields=short_code,click_count` returns (and loads) only those fields.
+
+    Requires authentication token in the Authorization header.
+    """
+    user = await AuthService.get_current_user(token=credentials.credentials, db=db)
+    if cursor:
+        # Reject a bad cursor with a 400 before the response starts
+        LinkService.decode_cursor(cursor)
+    projection = parse_fields(fields)
+    serialize = link_serializer(projection)
+    columns = link_columns(projection, "created_at", "id")
+    user_id = user.id
+
+    def page():
+        page_db = SessionLocal()
+        try:
+            yield b'{"items":['
+            last, more, count = None, False, 0
+            for link in LinkService.list_user_links(
+                page_db, user_id, limit, cursor, expired, has_preview, min_clicks, columns
+            ):
+                if count == limit:
+                    more = True
+                    break
+                yield (b"," if count else b"") + orjson.dumps(serialize(link))
+                last, count = link, count + 1
+            next_cursor = LinkService.encode_cursor(last) if more else None
+            yield b'],"next_cursor":' + orjson.dumps(next_cursor) + b'}'
+        finally:
+            page_db.close()
+
+    return StreamingResponse(page(), media_type="application/json")
 
 @router.delete("/links/{short_code}")
 async def delete_link(
@@ -81,16 +222,26 @@ async def update_link(
     ```
     """
     user = await AuthService.get_current_user(token=credentials.credentials, db=db)
-    return LinkService.update_link(db, short_code, data, user)
+    updated = await run_in_threadpool(LinkService.update_link, db, short_code, data, user)
+    return ORJSONResponse(serialize_link(updated))
 
-@router.get("/links/{short_code}/stats", response_model=LinkInfo)
+@router.get("/links/{short_code}/stats", response_model=LinkStats)
 async def link_stats(
     short_code: str,
+    granularity: Optional[Literal["minute", "hour", "day"]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[str] = None,
     credentials: HTTPAuthorizationCredentials = Security(security),
     db: Session = Depends(get_db)
 ):
     """
     Get statistics for a link.
+
+    Pass `granularity` (minute, hour or day) to also get a click time
+    series for `[since, until)`, read from the pre-aggregated rollups.
+    Defaults to the last 24 buckets; timestamps without an offset are UTC. `fields=click_count,last_accessed`
+    returns (and loads) only those link fields.
     
     Requires authentication token in the Authorization header.
     Example:
@@ -99,12 +250,26 @@ async def link_stats(
     ```
     """
     user = await AuthService.get_current_user(token=credentials.credentials, db=db)
-    return LinkService.get_link(db, short_code)
+    # Served from a replica unless this user or link was just written
+    use_primary = read_your_writes.user_is_sticky(user.id) or read_your_writes.code_is_sticky(short_code)
+    projection = parse_fields(fields)
+    with read_session(use_primary) as read_db:
+        link = LinkService.get_link(read_db, short_code, link_columns(projection, "expires_at"))
+        stats = link_serializer(projection)(link)
+        stats["timeseries"] = None
+        if granularity:
+            stats["timeseries"] = [
+                {"bucket_start": start, "clicks": clicks}
+                for start, clicks in LinkService.get_click_timeseries(
+                    read_db, short_code, granularity, naive_utc(since), naive_utc(until)
+                )
+            ]
+    return ORJSONResponse(stats)
 
-@router.get("/links/search")
-def search_link(original_url: str, db: Session = Depends(get_db)):
+@router.get("/links/search", response_model=LinkInfo)
+def search_link(original_url: str, db: Session = Depends(get_read_db)):
     """Search for a link by its original URL."""
     link = LinkService.search_by_url(db, original_url)
     if not link:
         raise HTTPException(status_code=404, detail="Link not found")
-    return link
+    return ORJSONResponse(serialize_link(link))
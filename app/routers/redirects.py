@@ -0,0 +1,93 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import JSONResponse, RedirectResponse
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.routing import Match, Route
+from ..cache import CachedLink
+from ..config import settings
+from ..database import get_read_db, get_async_read_db
+from ..ratelimit import rate_limiter
+from ..redirects import RedirectService
+
+router = APIRouter()
+
+def _redirect_payload(short_code: str, original_url: str) -> dict:
+    # Ensure the URL has a proper scheme
+    url = original_url
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+
+    return {
+        "original_url": url,
+        "short_code": short_code
+    }
+
+# The same URL answers with a redirect or JSON depending on Accept, so caches must key on it
+_JSON_HEADERS = {"Cache-Control": "no-store", "Vary": "Accept"}
+
+def _cache_headers(link: CachedLink) -> dict:
+    max_age = settings.REDIRECT_CACHE_MAX_AGE_SECONDS
+    headers = {"Vary": "Accept"}
+    if link.expires_at:
+        # Never let a cache keep serving the redirect past the link's expiry
+        remaining = int((link.expires_at - datetime.utcnow()).total_seconds())
+        max_age = min(max_age, max(0, remaining))
+        headers["Expires"] = format_datetime(link.expires_at.replace(tzinfo=timezone.utc), usegmt=True)
+    headers["Cache-Control"] = f"public, max-age={max_age}" if max_age > 0 else "no-cache"
+    return headers
+
+def _redirect_response(short_code: str, link: CachedLink, request: Request):
+    payload = _redirect_payload(short_code, link.original_url)
+    if "application/json" in request.headers.get("accept", ""):
+        return JSONResponse(payload, headers=_JSON_HEADERS)
+    return RedirectResponse(
+        payload["original_url"], status_code=settings.REDIRECT_STATUS_CODE, headers=_cache_headers(link)
+    )
+
+def _record_click(short_code: str, request: Request) -> None:
+    headers = request.headers
+    # X-Forwarded-For is only believed behind a trusted proxy, as for rate limiting
+    ip = rate_limiter.client_ip(request)
+    RedirectService.record_click(short_code, headers.get("referer"), headers.get("user-agent"), ip)
+
+def redirect_link(short_code: str, request: Request, db: Session = Depends(get_read_db)):
+    """Redirect to the original URL, or return it as JSON for Accept: application/json."""
+    link = RedirectService.resolve_link(db, short_code)
+    _record_click(short_code, request)
+    return _redirect_response(short_code, link, request)
+
+async def redirect_link_async(short_code: str, request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    """Redirect to the original URL, or return it as JSON for Accept: application/json."""
+    link = await RedirectService.resolve_link_async(db, short_code)
+    _record_click(short_code, request)
+    return _redirect_response(short_code, link, request)
+
+router.add_api_route(
+    "/{short_code}",
+    redirect_link_async if settings.ASYNC_REDIRECTS else redirect_link,
+    methods=["GET"]
+)
+
+
+async def redirect_fast(request: Request):
+    """Same as redirect_link without FastAPI's dependency injection and response model layers."""
+    short_code = request.path_params["short_code"]
+    link = await RedirectService.resolve_link_fast(short_code)
+    _record_click(short_code, request)
+    return _redirect_response(short_code, link, request)
+
+
+class FastRoute(Route):
+    """Starlette route that records itself in the scope the way APIRoute does, for metrics labels."""
+
+    def matches(self, scope):
+        match, child_scope = super().matches(scope)
+        if match is not Match.NONE:
+            child_scope["route"] = self
+        return match, child_scope
+
+
+# Added straight to the app's router: include_router would rebuild it as a plain Route
+fast_route = FastRoute("/{short_code}", redirect_fast, methods=["GET"], include_in_schema=False)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 from pydantic import BaseModel, EmailStr, HttpUrl, constr
 
 
@@ -37,7 +37,8 @@ class LinkBase(BaseModel):
 
 
 class LinkCreate(LinkBase):
-    pass
+    # Return the caller's existing link for the same normalized URL instead of creating one
+    reuse_existing: bool = False
 
 
 class LinkUpdate(BaseModel):
@@ -50,6 +51,7 @@ class LinkPreview(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     image_url: Optional[str] = None
+    status: Optional[str] = None
 
 
 class LinkInfo(LinkBase):
@@ -62,4 +64,18 @@ class LinkInfo(LinkBase):
     preview: Optional[LinkPreview] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class ClickBucket(BaseModel):
+    bucket_start: datetime
+    clicks: int
+
+
+class LinkStats(LinkInfo):
+    timeseries: Optional[List[ClickBucket]] = None
+
+
+class LinkPage(BaseModel):
+    items: List[LinkInfo]
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,66 @@
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+from .models import Link
+from .schemas import LinkInfo, LinkPreview
+
+# Response field order, and the columns a projection may ask for
+LINK_FIELDS = tuple(LinkInfo.model_fields)
+PREVIEW_FIELDS = tuple(LinkPreview.model_fields)
+
+
+def _preview(value: Optional[dict]) -> Optional[dict]:
+    # The stored blob may carry keys the schema does not expose
+    if value is None:
+        return None
+    return {name: value.get(name) for name in PREVIEW_FIELDS}
+
+
+_CONVERTERS: Dict[str, Callable[[Any], Any]] = {"preview": _preview}
+
+
+@lru_cache(maxsize=256)
+def link_serializer(fields: Tuple[str, ...] = LINK_FIELDS) -> Callable[[Link], dict]:
+    """
+    Build a function that turns a Link row into the LinkInfo JSON shape.
+
+    Rows come from our own database, so the schema's validation is skipped
+    and the resulting dict goes straight to orjson, which encodes datetimes
+    the same way pydantic does. Serializers are cached per field tuple.
+    """
+    plain = [(name, attrgetter(name)) for name in fields if name not in _CONVERTERS]
+    converted = [(name, attrgetter(name), _CONVERTERS[name]) for name in fields if name in _CONVERTERS]
+
+    def serialize(link: Link) -> dict:
+        data = {name: get(link) for name, get in plain}
+        for name, get, convert in converted:
+            data[name] = convert(get(link))
+        return data
+
+    return serialize
+
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """Parse a `?fields=a,b` projection, keeping the response order; 400 on unknown names."""
+    if not fields:
+        return LINK_FIELDS
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested.difference(LINK_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(name for name in LINK_FIELDS if name in requested)
+
+
+def link_columns(fields: Tuple[str, ...], *required: str) -> Optional[list]:
+    """Link columns to load for a projection, or None to load the whole row."""
+    names = set(fields).union(required)
+    if names.issuperset(LINK_FIELDS):
+        return None
+    return [getattr(Link, name) for name in LINK_FIELDS if name in names]
+
+
+def serialize_link(link: Link) -> dict:
+    return link_serializer()(link)
@@ -1,32 +1,46 @@
 import uuid
-import random
-import string
+import time
+import json
+import base64
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
-from sqlalchemy.orm import Session
+from typing import Optional, List, Tuple, Dict, Any
+from sqlalchemy import select, insert, tuple_, or_, func
+from sqlalchemy.orm import Session, load_only
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from .models import User, Link
 from .schemas import UserCreate, LinkCreate, LinkUpdate, LinkInfo
 from .config import settings
 from .link_validator import LinkValidator
 from .database import get_db
+from .cache import link_cache, LocalCache
+from .consistency import read_your_writes
+from .analytics import click_timeseries, bucket_start, GRANULARITIES
+from .previews import preview_worker, PREVIEW_PENDING
+from .allocator import get_allocator
+from .hashing import password_hasher
+from .normalization import url_fingerprint
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# Verified principals keyed by token digest; entries never outlive the token's exp
+# and are dropped after AUTH_CACHE_TTL_SECONDS so user removal takes effect.
+principal_cache = LocalCache(settings.AUTH_CACHE_MAX_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+
 
 class AuthService:
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
-        return pwd_context.verify(plain_password, hashed_password)
+        return password_hasher.verify(plain_password, hashed_password)
 
     @staticmethod
     def get_password_hash(password: str) -> str:
-        return pwd_context.hash(password)
+        return password_hasher.hash(password)
 
     @staticmethod
     def create_user(db: Session, user: UserCreate) -> User:
@@ -46,10 +60,33 @@ class AuthService:
             raise HTTPException(status_code=400, detail="Username or email already registered")
 
     @staticmethod
-    def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+    def _find_user(db: Session, username: str) -> Optional[User]:
         user = db.query(User).filter(User.username == username).first()
-        if not user or not AuthService.verify_password(password, user.password):
+        if user is not None:
+            # Give the pooled connection back while bcrypt runs
+            db.expunge(user)
+            db.rollback()
+        return user
+
+    @staticmethod
+    def _store_password_hash(db: Session, user_id: str, new_hash: str) -> None:
+        db.query(User).filter(User.id == user_id).update({User.password: new_hash}, synchronize_session=False)
+        db.commit()
+
+    @staticmethod
+    async def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+        # The sync session's queries run in the threadpool so they never block the event loop
+        user = await run_in_threadpool(AuthService._find_user, db, username)
+        if not user:
             return None
+
+        valid, new_hash = await password_hasher.verify_and_update_async(password, user.password)
+        if not valid:
+            return None
+        if new_hash:
+            # The stored hash predates the current BCRYPT_ROUNDS
+            await run_in_threadpool(AuthService._store_password_hash, db, user.id, new_hash)
+            user.password = new_hash
         return user
 
     @staticmethod
@@ -67,6 +104,11 @@ class AuthService:
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+        cache_key = hashlib.sha256(token.encode()).hexdigest()
+        cached = principal_cache.get(cache_key)
+        if cached is not None:
+            return db.merge(cached, load=False)
+
         try:
             payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
             user_id: str = payload.get("sub")
@@ -78,18 +120,23 @@ class AuthService:
         user = db.query(User).filter(User.id == user_id).first()
         if user is None:
             raise credentials_exception
+
+        ttl = min(settings.AUTH_CACHE_TTL_SECONDS, payload.get("exp", 0) - time.time())
+        if ttl > 0:
+            # Cache a detached copy so commits in this request cannot expire it
+            db.expunge(user)
+            principal_cache.set(cache_key, user, ttl=ttl)
+            return db.merge(user, load=False)
         return user
 
 
 class LinkService:
     @staticmethod
-    def generate_short_code(length: int = 6) -> str:
-        chars = string.ascii_letters + string.digits
-        return ''.join(random.choice(chars) for _ in range(length))
+    def generate_short_code() -> str:
+        return get_allocator().allocate()
 
     @staticmethod
-    def create_link(db: Session, link_data: LinkCreate, user: Optional[User] = None) -> Link:
-        validator = LinkValidator()
+    def _validate_link_data(validator: LinkValidator, link_data: LinkCreate) -> str:
         url_str = str(link_data.original_url)
         if not validator.validate_url(url_str):
             raise HTTPException(status_code=400, detail="Invalid URL format")
@@ -98,30 +145,180 @@ class LinkService:
         if link_data.custom_alias:
             validator.validate_alias(link_data.custom_alias)
 
-        preview = validator.generate_preview(url_str)
+        return url_str
 
-        db_link = Link(
-            id=str(uuid.uuid4()),
-            original_url=url_str,
-            short_code=link_data.custom_alias or LinkService.generate_short_code(),
-            custom_alias=link_data.custom_alias,
-            user_id=user.id if user else None,
-            expires_at=link_data.expires_at,
-            preview=preview
-        )
+    @staticmethod
+    def create_link(db: Session, link_data: LinkCreate, user: Optional[User] = None) -> Link:
+        if link_data.reuse_existing and not link_data.custom_alias:
+            existing = LinkService.find_reusable_link(db, str(link_data.original_url), link_data, user)
+            if existing:
+                return existing
 
-        try:
-            db.add(db_link)
-            db.commit()
-            db.refresh(db_link)
-            return db_link
-        except IntegrityError:
-            db.rollback()
-            raise HTTPException(status_code=400, detail="Short code or custom alias already exists")
+        validator = LinkValidator()
+        url_str = LinkService._validate_link_data(validator, link_data)
+        normalized_url, digest = url_fingerprint(url_str)
+
+        # A generated code can only be taken by a custom alias in the same format; allocate another one then
+        attempts = 1 if link_data.custom_alias else 3
+        for attempt in range(attempts):
+            db_link = Link(
+                id=str(uuid.uuid4()),
+                original_url=url_str,
+                normalized_url=normalized_url,
+                url_hash=digest,
+                short_code=link_data.custom_alias or LinkService.generate_short_code(),
+                custom_alias=link_data.custom_alias,
+                user_id=user.id if user else None,
+                expires_at=link_data.expires_at,
+                preview=dict(PREVIEW_PENDING)
+            )
+
+            try:
+                db.add(db_link)
+                db.commit()
+                db.refresh(db_link)
+                break
+            except IntegrityError:
+                db.rollback()
+                if attempt == attempts - 1:
+                    raise HTTPException(status_code=400, detail="Short code or custom alias already exists")
+
+        # Drop any negative entry cached while the code did not exist yet
+        link_cache.invalidate(db_link.short_code)
+        read_your_writes.mark(user.id if user else None, [db_link.short_code])
+        preview_worker.submit(db_link.id, url_str)
+        return db_link
 
     @staticmethod
-    def get_link(db: Session, short_code: str) -> Link:
-        link = db.query(Link).filter(Link.short_code == short_code).first()
+    def _allocate_bulk_codes(
+        db: Session, items: List[Tuple[int, LinkCreate, str]], check_candidates: bool = False
+    ) -> Tuple[List[Tuple[int, LinkCreate, str, str]], Dict[int, str]]:
+        """
+        Assign short codes to a batch, checking aliases and any random candidates in one query.
+
+        Codes from a unique allocator are only checked with check_candidates,
+        which the retry after a collision with a custom alias sets.
+        """
+        allocator = get_allocator()
+        aliases = [link_data.custom_alias for _, link_data, _ in items if link_data.custom_alias]
+        needed = len(items) - len(aliases)
+
+        if allocator.guarantees_unique:
+            candidates = set(allocator.allocate_many(needed))
+        else:
+            # Over-generate so random collisions rarely need a second round-trip
+            candidates = set(allocator.allocate_many(needed * 2))
+
+        existing = set()
+        wanted = set(aliases) | (set() if allocator.guarantees_unique and not check_candidates else candidates)
+        if wanted:
+            existing = {row[0] for row in db.query(Link.short_code).filter(Link.short_code.in_(wanted))}
+
+        free = [code for code in candidates if code not in existing and code not in aliases]
+        while len(free) < needed:
+            extra = set(allocator.allocate_many(needed - len(free))) - set(free) - set(aliases)
+            taken = {row[0] for row in db.query(Link.short_code).filter(Link.short_code.in_(extra))}
+            free.extend(extra - taken)
+
+        allocated, errors = [], {}
+        used_aliases = set()
+        for index, link_data, url_str in items:
+            alias = link_data.custom_alias
+            if alias:
+                if alias in existing or alias in used_aliases:
+                    errors[index] = "Custom alias is already taken"
+                    continue
+                used_aliases.add(alias)
+                allocated.append((index, link_data, url_str, alias))
+            else:
+                allocated.append((index, link_data, url_str, free.pop()))
+        return allocated, errors
+
+    @staticmethod
+    def create_links_bulk(
+        db: Session, items: List[Tuple[int, LinkCreate]], user: Optional[User] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Create a batch of links in one transaction.
+
+        URLs are validated concurrently, short codes are allocated with a
+        single collision query, and rows are written with one executemany
+        insert. Returns one result dict per input item, in input order.
+        """
+        validator = LinkValidator()
+        results: Dict[int, Dict[str, Any]] = {}
+
+        # Same rule as create_link: reuse is checked before validation and never applies to aliases
+        fresh = []
+        for index, link_data in items:
+            existing = None
+            if link_data.reuse_existing and not link_data.custom_alias:
+                existing = LinkService.find_reusable_link(db, str(link_data.original_url), link_data, user)
+            if existing:
+                results[index] = {"index": index, "short_code": existing.short_code, "original_url": existing.original_url}
+            else:
+                fresh.append((index, link_data))
+
+        with ThreadPoolExecutor(max_workers=settings.BULK_VALIDATION_CONCURRENCY) as pool:
+            futures = [
+                (index, link_data, pool.submit(LinkService._validate_link_data, validator, link_data))
+                for index, link_data in fresh
+            ]
+        valid = []
+        for index, link_data, future in futures:
+            try:
+                valid.append((index, link_data, future.result()))
+            except HTTPException as e:
+                results[index] = {"index": index, "error": e.detail}
+
+        allocated = []
+        for attempt in range(2):
+            allocated, errors = LinkService._allocate_bulk_codes(db, valid, check_candidates=attempt > 0)
+            rows = []
+            for _, link_data, url_str, short_code in allocated:
+                normalized_url, digest = url_fingerprint(url_str)
+                rows.append({
+                    "id": str(uuid.uuid4()),
+                    "original_url": url_str,
+                    "normalized_url": normalized_url,
+                    "url_hash": digest,
+                    "short_code": short_code,
+                    "custom_alias": link_data.custom_alias,
+                    "user_id": user.id if user else None,
+                    "expires_at": link_data.expires_at,
+                    "preview": dict(PREVIEW_PENDING)
+                })
+            try:
+                if rows:
+                    db.execute(insert(Link), rows)
+                db.commit()
+                break
+            except IntegrityError:
+                # A concurrent writer or a custom alias took one of the codes; allocate again
+                db.rollback()
+        else:
+            errors = {index: "Short code or custom alias already exists" for index, _, _ in valid}
+            rows = allocated = []
+
+        for index, message in errors.items():
+            results[index] = {"index": index, "error": message}
+        for (index, _, url_str, short_code), row in zip(allocated, rows):
+            results[index] = {"index": index, "short_code": short_code, "original_url": url_str}
+
+        link_cache.invalidate_many([row["short_code"] for row in rows])
+        read_your_writes.mark(user.id if user else None, [row["short_code"] for row in rows])
+        for row in rows:
+            preview_worker.submit(row["id"], row["original_url"])
+
+        return [results[index] for index, _ in items]
+
+    @staticmethod
+    def get_link(db: Session, short_code: str, columns: Optional[list] = None) -> Link:
+        """Fetch a live link; columns restricts the load to those attributes (expires_at is always loaded)."""
+        query = db.query(Link).filter(Link.short_code == short_code)
+        if columns:
+            query = query.options(load_only(*columns, Link.expires_at))
+        link = query.first()
         if not link:
             raise HTTPException(status_code=404, detail="Link not found")
         
@@ -137,19 +334,25 @@ class LinkService:
         if link.user_id != user.id:
             raise HTTPException(status_code=403, detail="Not authorized to update this link")
 
+        url_str = None
         if link_data.original_url:
             validator = LinkValidator()
             url_str = str(link_data.original_url)
             validator.validate_url(url_str)
             validator.is_safe_url(url_str)
             link.original_url = url_str
-            link.preview = validator.generate_preview(url_str)
+            link.normalized_url, link.url_hash = url_fingerprint(url_str)
+            link.preview = dict(PREVIEW_PENDING)
 
         if link_data.expires_at:
             link.expires_at = link_data.expires_at
 
         db.commit()
         db.refresh(link)
+        link_cache.invalidate(short_code)
+        read_your_writes.mark(user.id, [short_code])
+        if url_str:
+            preview_worker.submit(link.id, url_str)
         return link
 
     @staticmethod
@@ -161,13 +364,95 @@ class LinkService:
 
         db.delete(link)
         db.commit()
+        link_cache.invalidate(short_code)
+        read_your_writes.mark(user.id, [short_code])
 
     @staticmethod
-    def increment_click_count(db: Session, link: Link) -> None:
-        link.click_count += 1
-        link.last_accessed = datetime.utcnow()
-        db.commit()
+    def get_click_timeseries(
+        db: Session,
+        short_code: str,
+        granularity: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[Tuple[datetime, int]]:
+        step = GRANULARITIES[granularity]
+        # Default window ends with the current (partial) bucket
+        until = until or bucket_start(datetime.utcnow(), granularity) + step
+        since = since or until - 24 * step
+        if (until - since) / step > settings.STATS_MAX_BUCKETS:
+            raise HTTPException(status_code=400, detail="Requested range has too many buckets")
+        return click_timeseries(db, short_code, granularity, since, until)
+
+    @staticmethod
+    def encode_cursor(link: Link) -> str:
+        raw = json.dumps([link.created_at.isoformat(), link.id]).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            created_at, link_id = json.loads(raw)
+            return datetime.fromisoformat(created_at), str(link_id)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    @staticmethod
+    def list_user_links(
+        db: Session,
+        user_id: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        expired: Optional[bool] = None,
+        has_preview: Optional[bool] = None,
+        min_clicks: Optional[int] = None,
+        columns: Optional[list] = None
+    ):
+        """
+        Stream up to limit + 1 of a user's links, newest first.
+
+        Pages are keyed on (created_at, id) after the cursor rather than on
+        an OFFSET, so every page is a range scan of ix_links_user_created_id.
+        The extra row tells the caller whether another page exists. With
+        columns, only those attributes plus the cursor keys are loaded.
+        """
+        query = select(Link).where(Link.user_id == user_id)
+        if columns:
+            query = query.options(load_only(*columns, Link.created_at))
+        if cursor:
+            created_at, link_id = LinkService.decode_cursor(cursor)
+            query = query.where(tuple_(Link.created_at, Link.id) < tuple_(created_at, link_id))
+
+        now = datetime.utcnow()
+        if expired is True:
+            query = query.where(Link.expires_at <= now)
+        elif expired is False:
+            query = query.where(or_(Link.expires_at.is_(None), Link.expires_at > now))
+        if has_preview is not None:
+            ready = func.coalesce(Link.preview["status"].as_string(), "") == "ready"
+            query = query.where(ready if has_preview else ~ready)
+        if min_clicks:
+            query = query.where(Link.click_count >= min_clicks)
+
+        query = query.order_by(Link.created_at.desc(), Link.id.desc()).limit(limit + 1)
+        return db.execute(query.execution_options(yield_per=settings.LINKS_PAGE_FETCH_SIZE)).scalars()
+
+    @staticmethod
+    def _normalized_url_query(db: Session, original_url: str):
+        normalized_url, digest = url_fingerprint(original_url)
+        # The hash narrows to an index range; comparing the full URL rules out hash collisions
+        return db.query(Link).filter(Link.url_hash == digest, Link.normalized_url == normalized_url)
+
+    @staticmethod
+    def find_reusable_link(db: Session, original_url: str, link_data: LinkCreate, user: Optional[User]) -> Optional[Link]:
+        """Return the user's live link to the same normalized URL and expiry, if any."""
+        query = LinkService._normalized_url_query(db, original_url).filter(
+            Link.user_id == (user.id if user else None),
+            Link.custom_alias.is_(None),
+            Link.expires_at == link_data.expires_at if link_data.expires_at else Link.expires_at.is_(None)
+        )
+        return query.first()
 
     @staticmethod
     def search_by_url(db: Session, original_url: str) -> Optional[Link]:
-        return db.query(Link).filter(Link.original_url == original_url).first() 
\ No newline at end of file
+        return LinkService._normalized_url_query(db, original_url).first() 
\ No newline at end of file
@@ -0,0 +1,151 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any
+
+from sqlalchemy import select, insert, delete, literal
+
+from .cache import link_cache
+from .config import get_settings
+from .database import SessionLocal
+from .models import Link, ArchivedLink
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+links_table = Link.__table__
+archive_table = ArchivedLink.__table__
+
+
+class ExpiredLinkSweeper:
+    """
+    Background job that removes expired links in bounded batches.
+
+    Links stay in place for a tombstone period after they expire, so the
+    redirect path keeps answering 410 for them. After that they are
+    archived (or deleted), which frees their custom alias and keeps the
+    unique indexes small. Each batch is its own short transaction, with
+    a pause in between so the sweep never monopolises the database.
+    """
+
+    def __init__(self, interval: float, batch_size: int, pause: float, tombstone: float, mode: str):
+        if mode not in ("archive", "delete"):
+            raise ValueError(f"Unknown SWEEPER_MODE: {mode}")
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        self.tombstone = timedelta(seconds=tombstone)
+        self.mode = mode
+        self.swept_total = 0
+        self.batches_total = 0
+        self.runs_total = 0
+        self.last_run: Dict[str, Any] = {}
+        self._sweep_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def sweep_batch(self, cutoff: datetime) -> int:
+        """Sweep up to batch_size links that expired before the cutoff; return how many were swept."""
+        db = SessionLocal()
+        try:
+            # Walks ix_links_expires_at; SKIP LOCKED lets several workers sweep side by side
+            rows = db.execute(
+                select(links_table.c.id, links_table.c.short_code)
+                .where(links_table.c.expires_at < cutoff)
+                .order_by(links_table.c.expires_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if not rows:
+                return 0
+
+            ids = [row.id for row in rows]
+            if self.mode == "archive":
+                columns = [column for column in links_table.columns]
+                db.execute(
+                    insert(archive_table).from_select(
+                        [column.name for column in columns] + ["archived_at"],
+                        select(*columns, literal(datetime.utcnow())).where(links_table.c.id.in_(ids))
+                    )
+                )
+            db.execute(delete(links_table).where(links_table.c.id.in_(ids)))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        link_cache.invalidate_many([row.short_code for row in rows])
+        return len(rows)
+
+    def sweep(self) -> int:
+        """Run one full pass over everything past its tombstone period."""
+        with self._sweep_lock:
+            started = time.monotonic()
+            cutoff = datetime.utcnow() - self.tombstone
+            swept = batches = 0
+            while not self._stopping.is_set():
+                count = self.sweep_batch(cutoff)
+                if count:
+                    swept += count
+                    batches += 1
+                    self.swept_total += count
+                    self.batches_total += 1
+                if count < self.batch_size:
+                    break
+                self._stopping.wait(self.pause)
+
+            elapsed = time.monotonic() - started
+            self.runs_total += 1
+            self.last_run = {
+                "finished_at": datetime.utcnow().isoformat(),
+                "swept": swept,
+                "batches": batches,
+                "seconds": round(elapsed, 3),
+                "links_per_second": round(swept / elapsed, 1) if elapsed > 0 else 0.0,
+            }
+            if swept:
+                logger.info("Swept %d expired links in %d batches (%.1fs)", swept, batches, elapsed)
+            return swept
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "runs_total": self.runs_total,
+            "swept_total": self.swept_total,
+            "batches_total": self.batches_total,
+            "last_run": self.last_run,
+        }
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("Expired link sweep failed")
+
+    def start(self) -> None:
+        """Start the background sweeper thread."""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="link-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the sweeper, letting an in-progress batch finish."""
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+
+
+link_sweeper = ExpiredLinkSweeper(
+    settings.SWEEPER_INTERVAL_SECONDS,
+    settings.SWEEPER_BATCH_SIZE,
+    settings.SWEEPER_BATCH_PAUSE_SECONDS,
+    settings.SWEEPER_TOMBSTONE_SECONDS,
+    settings.SWEEPER_MODE
+)
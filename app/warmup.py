@@ -0,0 +1,110 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, func, or_
+
+from .analytics import bucket_start
+from .cache import link_cache, CachedLink
+from .config import get_settings
+from .database import SessionLocal
+from .models import Link, ClickRollup
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    """
+    Preloads the hottest links into the redirect cache.
+
+    The first pass starts with the application but runs on its own
+    thread, one chunk at a time, so startup and the health check are
+    never held up by it. Later passes re-rank the hot set every
+    CACHE_WARMUP_INTERVAL_SECONDS and refresh those entries.
+
+    Only the Redis copy outlives a pass. Local entries keep the usual
+    short TTL, because invalidation only reaches the local tier of the
+    worker that handled the update.
+    """
+
+    def __init__(self, strategy: str, top_n: int, chunk_size: int, recent_hours: int, interval: float):
+        if strategy not in ("clicks", "recent"):
+            raise ValueError(f"Unknown CACHE_WARMUP_STRATEGY: {strategy}")
+        self.strategy = strategy
+        self.top_n = top_n
+        self.chunk_size = chunk_size
+        self.recent_hours = recent_hours
+        self.interval = interval
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def hot_links_query(self):
+        now = datetime.utcnow()
+        query = select(Link.short_code, Link.original_url, Link.expires_at).where(
+            or_(Link.expires_at.is_(None), Link.expires_at > now)
+        )
+        if self.strategy == "clicks":
+            return query.order_by(Link.click_count.desc()).limit(self.top_n)
+
+        since = bucket_start(now - timedelta(hours=self.recent_hours), "hour")
+        hot = (
+            select(ClickRollup.short_code, func.sum(ClickRollup.clicks).label("clicks"))
+            .where(ClickRollup.granularity == "hour", ClickRollup.bucket_start >= since)
+            .group_by(ClickRollup.short_code)
+            .order_by(func.sum(ClickRollup.clicks).desc())
+            .limit(self.top_n)
+            .subquery()
+        )
+        return query.join(hot, hot.c.short_code == Link.short_code).order_by(hot.c.clicks.desc())
+
+    def warm(self) -> int:
+        """Load the current hot set into the cache and return how many links were cached."""
+        # Taken before the query, so links changed while the pass runs are not re-cached from old rows
+        since = link_cache.epoch()
+        db = SessionLocal()
+        warmed = 0
+        try:
+            result = db.execute(self.hot_links_query().execution_options(yield_per=self.chunk_size))
+            for rows in result.partitions():
+                if self._stopping.is_set():
+                    break
+                warmed += link_cache.set_many(
+                    [(row.short_code, CachedLink(row.original_url, row.expires_at)) for row in rows],
+                    since
+                )
+        finally:
+            db.close()
+        return warmed
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                warmed = self.warm()
+                logger.info("Warmed redirect cache with %d links", warmed)
+            except Exception:
+                logger.exception("Redirect cache warmup failed")
+            self._stopping.wait(self.interval)
+
+    def start(self) -> None:
+        """Start warming in the background; returns immediately."""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-warmer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+
+
+cache_warmer = CacheWarmer(
+    settings.CACHE_WARMUP_STRATEGY,
+    settings.CACHE_WARMUP_TOP_N,
+    settings.CACHE_WARMUP_CHUNK_SIZE,
+    settings.CACHE_WARMUP_RECENT_HOURS,
+    settings.CACHE_WARMUP_INTERVAL_SECONDS
+)
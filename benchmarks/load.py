@@ -0,0 +1,240 @@
+"""
+Offline load test for the redirect, shorten and login paths.
+
+Usage:
+    python -m benchmarks.load [--links N] [--concurrency N] [--requests N]
+                              [--scenarios redirect,shorten,login] [--zipf S]
+                              [--database-url URL] [--skip-seed] [--http-latency MS]
+
+Seeds N synthetic links through the models in app/models.py (a scratch
+SQLite file unless --database-url or DATABASE_URL points elsewhere, e.g.
+Postgres), then drives the ASGI app in-process (requires httpx) with the
+lifespan running, so the click buffer and other background workers behave
+as in production. Outbound HTTP from requests (the content-type probe and
+preview fetches) is answered by a local stub after --http-latency ms, so
+runs need no network and are repeatable.
+
+Each scenario keeps --concurrency requests in flight until --requests have
+completed. Redirect keys follow a Zipf distribution with exponent --zipf
+over the seeded links, so a few links take most of the traffic the way real
+short links do. Shorten creates unique URLs, half of them without a safe
+extension so the probe runs. Login verifies one seeded user's bcrypt hash.
+Per-scenario req/s and p50/p95/p99 latency are printed as JSON; --seed
+fixes the key sequence so runs can be compared.
+"""
+import argparse
+import asyncio
+import bisect
+import itertools
+import json
+import os
+import random
+import tempfile
+import time
+
+BENCH_USER = "bench"
+BENCH_PASSWORD = "bench-password"
+SEED_CHUNK = 10000
+STUB_HTML = b"<html><head><title>Bench</title><meta name='description' content='stub'></head><body></body></html>"
+
+
+def short_code(index):
+    # "z" plus base-36 keeps seeded codes apart from generated ones
+    digits = []
+    while True:
+        index, remainder = divmod(index, 36)
+        digits.append("0123456789abcdefghijklmnopqrstuvwxyz"[remainder])
+        if not index:
+            break
+    return "z" + "".join(reversed(digits)).rjust(7, "0")
+
+
+def percentiles(samples, elapsed):
+    samples = sorted(samples)
+    pick = lambda q: round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 3)
+    return {
+        "requests": len(samples),
+        "req_per_s": round(len(samples) / elapsed, 1),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": round(samples[-1] * 1000, 3),
+    }
+
+
+class Zipf:
+    """Samples ranks 0..n-1 with P(k) proportional to 1 / (k + 1) ** s."""
+
+    def __init__(self, n, s, rng):
+        self.cumulative = list(itertools.accumulate(1.0 / (k + 1) ** s for k in range(n)))
+        self.rng = rng
+
+    def __call__(self):
+        return bisect.bisect_left(self.cumulative, self.rng.random() * self.cumulative[-1])
+
+
+def stub_outbound_http(latency):
+    """Answer every requests call locally with a small HTML page."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    def send(adapter, request, **kwargs):
+        if latency:
+            time.sleep(latency)
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "text/html; charset=utf-8"
+        response._content = b"" if request.method == "HEAD" else STUB_HTML
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf-8"
+        return response
+
+    HTTPAdapter.send = send
+
+
+def seed(links):
+    from sqlalchemy import delete, insert
+    from app.database import Base, SessionLocal, get_engine
+    from app.models import Link, User
+    from app.normalization import url_fingerprint
+    from app.schemas import UserCreate
+    from app.services import AuthService
+
+    Base.metadata.create_all(bind=get_engine())
+    db = SessionLocal()
+    try:
+        # Only rows owned by the benchmark user from an earlier run are removed
+        previous = db.query(User).filter(User.username == BENCH_USER).first()
+        if previous is not None:
+            db.execute(delete(Link).where(Link.user_id == previous.id))
+            db.delete(previous)
+            db.commit()
+        user = AuthService.create_user(
+            db, UserCreate(username=BENCH_USER, email="bench@example.com", password=BENCH_PASSWORD)
+        )
+        table = Link.__table__
+        for start in range(0, links, SEED_CHUNK):
+            rows = []
+            for i in range(start, min(start + SEED_CHUNK, links)):
+                url = f"https://example.com/articles/{i}.html"
+                normalized_url, digest = url_fingerprint(url)
+                rows.append({
+                    "id": f"00000000-0000-4000-8000-{i:012d}",
+                    "short_code": short_code(i),
+                    "original_url": url,
+                    "normalized_url": normalized_url,
+                    "url_hash": digest,
+                    "user_id": user.id,
+                    "click_count": 0,
+                })
+            db.execute(insert(table), rows)
+            db.commit()
+    finally:
+        db.close()
+
+
+async def drive(concurrency, requests, make_request):
+    """Run make_request(i) for i in range(requests) with `concurrency` in flight."""
+    counter = itertools.count()
+    samples, errors = [], []
+
+    async def worker():
+        while True:
+            i = next(counter)
+            if i >= requests:
+                return
+            start = time.perf_counter()
+            status = await make_request(i)
+            samples.append(time.perf_counter() - start)
+            if status >= 400:
+                errors.append(status)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    report = percentiles(samples, time.perf_counter() - started)
+    report["errors"] = len(errors)
+    return report
+
+
+async def run(args):
+    import httpx
+    from app.main import app
+
+    rng = random.Random(args.seed)
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            response = await client.post("/auth/login/json", json={"username": BENCH_USER, "password": BENCH_PASSWORD})
+            response.raise_for_status()
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            for scenario in args.scenarios.split(","):
+                if scenario == "redirect":
+                    zipf = Zipf(args.links, args.zipf, rng)
+                    # Drawn up front so sampling cost stays out of the latencies
+                    keys = [short_code(zipf()) for _ in range(args.requests)]
+
+                    async def make_request(i):
+                        return (await client.get(f"/{keys[i]}", follow_redirects=False)).status_code
+                elif scenario == "shorten":
+                    run_id = rng.randrange(1 << 30)
+
+                    async def make_request(i):
+                        suffix = ".html" if i % 2 else ""
+                        payload = {"original_url": f"https://bench{run_id}.example.net/p/{i}{suffix}"}
+                        return (await client.post("/links/shorten", json=payload, headers=headers)).status_code
+                elif scenario == "login":
+                    async def make_request(i):
+                        payload = {"username": BENCH_USER, "password": BENCH_PASSWORD}
+                        return (await client.post("/auth/login/json", json=payload)).status_code
+                else:
+                    raise SystemExit(f"Unknown scenario: {scenario}")
+
+                requests = args.requests if scenario != "login" else max(1, args.requests // 20)
+                results[scenario] = await drive(args.concurrency, requests, make_request)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--links", type=int, default=100000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=5000, help="per scenario; login runs 1/20 of this")
+    parser.add_argument("--scenarios", default="redirect,shorten,login")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent for redirect keys")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--database-url", help="defaults to DATABASE_URL, else a scratch SQLite file")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse links seeded by an earlier run")
+    parser.add_argument("--http-latency", type=float, default=20.0, help="stubbed outbound HTTP latency in ms")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/load.db")
+    # The scenarios deliberately exceed the per-user and per-username limits
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    stub_outbound_http(args.http_latency / 1000)
+
+    seed_seconds = None
+    if not args.skip_seed:
+        started = time.perf_counter()
+        seed(args.links)
+        seed_seconds = round(time.perf_counter() - started, 1)
+
+    results = asyncio.run(run(args))
+    print(json.dumps({
+        "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+        "links": args.links,
+        "seed_seconds": seed_seconds,
+        "concurrency": args.concurrency,
+        "zipf": args.zipf,
+        "seed": args.seed,
+        "scenarios": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
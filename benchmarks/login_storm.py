@@ -0,0 +1,106 @@
+"""
+Redirect latency during a login storm.
+
+Usage:
+    python -m benchmarks.login_storm [--logins N] [--redirects N]
+
+Drives the ASGI app in-process (requires httpx) against a scratch SQLite
+database. Redirect latency is sampled once with no other load and once
+while N concurrent logins are running, and both summaries are printed as
+JSON. With bcrypt on the dedicated hasher pool the two should be close;
+the login numbers show how the pool is absorbing the burst. --inline runs
+bcrypt on the event loop instead, as the handlers used to, for comparison.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+    return {"n": len(samples), "p50_ms": round(pick(0.50), 3), "p99_ms": round(pick(0.99), 3),
+            "max_ms": round(samples[-1] * 1000, 3), "mean_ms": round(statistics.mean(samples) * 1000, 3)}
+
+
+async def sample_redirects(client, short_code, count):
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = await client.get(f"/{short_code}")
+        samples.append(time.perf_counter() - start)
+        assert response.status_code < 400, response.text
+        await asyncio.sleep(0.002)
+    return samples
+
+
+async def login(client, timings):
+    start = time.perf_counter()
+    response = await client.post("/auth/login/json", json={"username": "storm", "password": "storm-password"})
+    timings.append(time.perf_counter() - start)
+    assert response.status_code == 200, response.text
+
+
+async def run(args):
+    import httpx
+    from app.database import Base, engine, SessionLocal
+    from app.main import app
+    from app.models import Link
+    from app.schemas import UserCreate
+    from app.services import AuthService
+    from app.hashing import password_hasher, pwd_context
+
+    if args.inline:
+        async def verify_on_loop(password, hashed):
+            return pwd_context.verify_and_update(password, hashed)
+        password_hasher.verify_and_update_async = verify_on_loop
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = AuthService.create_user(db, UserCreate(username="storm", email="storm@example.com", password="storm-password"))
+    db.add(Link(short_code="storm01", original_url="https://example.com/", user_id=user.id))
+    db.commit()
+    db.close()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await sample_redirects(client, "storm01", 20)  # warm the resolution cache
+        idle = await sample_redirects(client, "storm01", args.redirects)
+
+        login_timings = []
+        depth = []
+        storm = asyncio.gather(*(login(client, login_timings) for _ in range(args.logins)))
+        async def watch():
+            while not storm.done():
+                depth.append(password_hasher.queue_depth())
+                await asyncio.sleep(0.01)
+        busy, _, _ = await asyncio.gather(sample_redirects(client, "storm01", args.redirects), storm, watch())
+
+    print(json.dumps({
+        "mode": "inline" if args.inline else "hasher_pool",
+        "redirect_idle": summarize(idle),
+        "redirect_during_login_storm": summarize(busy),
+        "login": summarize(login_timings),
+        "max_hasher_queue_depth": max(depth or [0]),
+    }, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=16)
+    parser.add_argument("--redirects", type=int, default=200)
+    parser.add_argument("--inline", action="store_true", help="verify passwords on the event loop")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/login_storm.db")
+    # The scenarios deliberately exceed the per-user and per-username limits
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Per-request overhead of MetricsMiddleware.
+
+Usage:
+    python -m benchmarks.metrics_overhead [--requests N] [--repeat R]
+
+Drives a no-op ASGI app directly (no server, no sockets) with and without
+the middleware, using a matched /{short_code} route in the scope the way
+the router leaves it. The best of R runs is taken for each variant and the
+difference per request is printed as JSON in microseconds.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from app.metrics import MetricsMiddleware
+
+
+class _Route:
+    path = "/{short_code}"
+
+
+START = {"type": "http.response.start", "status": 307, "headers": []}
+BODY = {"type": "http.response.body", "body": b""}
+
+
+async def bare_app(scope, receive, send):
+    scope["route"] = _Route
+    await send(START)
+    await send(BODY)
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def run(app, requests):
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app({"type": "http", "method": "GET", "path": "/abc1234"}, receive, send)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    wrapped = MetricsMiddleware(bare_app)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(run(wrapped, 1000))
+    bare = min(loop.run_until_complete(run(bare_app, args.requests)) for _ in range(args.repeat))
+    instrumented = min(loop.run_until_complete(run(wrapped, args.requests)) for _ in range(args.repeat))
+    loop.close()
+
+    print(json.dumps({
+        "requests": args.requests,
+        "bare_us_per_request": round(bare / args.requests * 1e6, 2),
+        "instrumented_us_per_request": round(instrumented / args.requests * 1e6, 2),
+        "overhead_us_per_request": round((instrumented - bare) / args.requests * 1e6, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
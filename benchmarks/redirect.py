@@ -0,0 +1,115 @@
+"""
+Redirect handler cost: FastAPI dependency-injected route vs the fast route,
+each answering with a real redirect and with the JSON body.
+
+Usage:
+    python -m benchmarks.redirect [--requests N] [--links N]
+
+Each variant runs in a fresh interpreter with its own REDIRECT_FAST_PATH
+setting and a scratch SQLite database. Requests are driven straight
+through the ASGI app (no server or HTTP client), so the numbers are the
+app's own per-request cost. Codes are looked up once before timing, so
+the timed requests are link cache hits. Per-variant mean/p50/p99
+microseconds and req/s are printed as JSON.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+VARIANTS = {
+    "di_redirect": ("false", b"*/*"),
+    "di_json": ("false", b"application/json"),
+    "fast_redirect": ("true", b"*/*"),
+    "fast_json": ("true", b"application/json"),
+}
+
+
+async def drive(app, codes, requests, accept):
+    status = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    def scope(code):
+        return {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": f"/{code}", "raw_path": f"/{code}".encode(), "root_path": "",
+            "query_string": b"", "headers": [(b"host", b"bench"), (b"accept", accept)],
+            "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+        }
+
+    for code in codes:
+        await app(scope(code), receive, send)
+    samples = []
+    for i in range(requests):
+        started = time.perf_counter()
+        await app(scope(codes[i % len(codes)]), receive, send)
+        samples.append(time.perf_counter() - started)
+    assert all(code < 400 for code in status), set(status)
+    return samples
+
+
+def run_variant(args):
+    from app.database import Base, SessionLocal, get_engine
+    from app.main import app
+    from app.models import Link
+
+    Base.metadata.create_all(bind=get_engine())
+    codes = [f"bench{i:03d}" for i in range(args.links)]
+    with SessionLocal() as db:
+        db.add_all(Link(short_code=code, original_url=f"https://example.com/{code}") for code in codes)
+        db.commit()
+
+    async def main():
+        async with app.router.lifespan_context(app):
+            return await drive(app, codes, args.requests, VARIANTS[args.variant][1])
+
+    samples = sorted(asyncio.run(main()))
+    print(json.dumps({
+        "mean_us": round(sum(samples) / len(samples) * 1e6, 1),
+        "p50_us": round(samples[len(samples) // 2] * 1e6, 1),
+        "p99_us": round(samples[int(0.99 * len(samples))] * 1e6, 1),
+        "req_per_s": round(len(samples) / sum(samples)),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--links", type=int, default=100)
+    parser.add_argument("--variant", choices=sorted(VARIANTS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        run_variant(args)
+        return
+
+    results = {}
+    for variant, (fast_path, _) in VARIANTS.items():
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{tempfile.mkdtemp()}/redirect.db",
+            REDIRECT_FAST_PATH=fast_path,
+            REDIS_CACHE_ENABLED="false",
+            CLICK_EVENTS_ENABLED="false",
+        )
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.redirect", "--variant", variant,
+             "--requests", str(args.requests), "--links", str(args.links)],
+            env=env, check=True, capture_output=True, text=True
+        ).stdout
+        results[variant] = json.loads(output.strip().splitlines()[-1])
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Cost of turning Link rows into LinkInfo JSON.
+
+Usage:
+    python -m benchmarks.serialization [--links N] [--repeat R]
+
+Builds N transient Link objects (no database) with a filled-in preview and
+serializes them the way FastAPI's response_model path did (validate with
+from_attributes, jsonable_encoder, json.dumps), with pydantic's
+model_dump_json, and with the cached link_serializer plus orjson, both for
+all fields and for a two-field projection. Best-of-R microseconds per link
+are printed as JSON.
+"""
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime
+
+
+def best(fn, links, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for link in links:
+            fn(link)
+        timings.append(time.perf_counter() - started)
+    return round(min(timings) / len(links) * 1e6, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--links", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    import orjson
+    from fastapi.encoders import jsonable_encoder
+    from app.models import Link
+    from app.schemas import LinkInfo
+    from app.serialization import link_serializer
+
+    now = datetime.utcnow()
+    links = [
+        Link(
+            id=str(uuid.uuid4()), short_code=f"b{i:06d}", original_url=f"https://example.com/articles/{i}.html",
+            user_id=str(uuid.uuid4()), created_at=now, click_count=i, last_accessed=now, expires_at=None,
+            preview={"title": "Title " * 10, "description": "Description " * 30, "image_url": None, "status": "ready"}
+        )
+        for i in range(args.links)
+    ]
+    full = link_serializer()
+    projected = link_serializer(("short_code", "click_count"))
+
+    print(json.dumps({
+        "links": args.links,
+        "response_model_us_per_link": best(
+            lambda link: json.dumps(jsonable_encoder(LinkInfo.model_validate(link))), links, args.repeat
+        ),
+        "model_dump_json_us_per_link": best(lambda link: LinkInfo.model_validate(link).model_dump_json(), links, args.repeat),
+        "orjson_us_per_link": best(lambda link: orjson.dumps(full(link)), links, args.repeat),
+        "orjson_projected_us_per_link": best(lambda link: orjson.dumps(projected(link)), links, args.repeat),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
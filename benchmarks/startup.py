@@ -0,0 +1,114 @@
+"""
+Cold-start cost of a worker: import time and time to first request.
+
+Usage:
+    python -m benchmarks.startup [--runs N] [--modes full,redirect]
+
+Every sample runs in a fresh interpreter. Import time is how long
+`import app.main` takes. Time to first request starts a uvicorn worker
+against a scratch SQLite database migrated with Alembic and measures
+until `/` answers and until the first redirect answers. Medians per
+SERVICE_MODE are printed as JSON.
+"""
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHORT_CODE = "bench01"
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+
+def prepare_database(path):
+    url = f"sqlite:///{path}"
+    env = dict(os.environ, DATABASE_URL=url)
+    subprocess.run(["alembic", "upgrade", "head"], cwd=REPO_ROOT, env=env, check=True, capture_output=True)
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "INSERT INTO links (id, short_code, original_url, click_count) VALUES (?, ?, ?, 0)",
+        ("00000000-0000-0000-0000-000000000001", SHORT_CODE, "https://example.com/")
+    )
+    connection.commit()
+    connection.close()
+    return url
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url, deadline):
+    # Ask for the JSON form so the redirect is not followed off the machine
+    request = urllib.request.Request(url, headers={"Accept": "application/json"})
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(request, timeout=1) as response:
+                response.read()
+                return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.005)
+    raise TimeoutError(url)
+
+
+def measure_import(env):
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], cwd=REPO_ROOT, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_first_request(env):
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        healthy = wait_for(f"http://127.0.0.1:{port}/", started + 60)
+        redirected = wait_for(f"http://127.0.0.1:{port}/{SHORT_CODE}", started + 60)
+    finally:
+        process.terminate()
+        process.wait()
+    return healthy - started, redirected - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--modes", default="full,redirect")
+    args = parser.parse_args()
+
+    database_url = prepare_database(os.path.join(tempfile.mkdtemp(), "startup.db"))
+    results = {}
+    for mode in args.modes.split(","):
+        env = dict(os.environ, DATABASE_URL=database_url, SERVICE_MODE=mode, REDIS_CACHE_ENABLED="false")
+        imports, healthy, first_redirect = [], [], []
+        for _ in range(args.runs):
+            imports.append(measure_import(env))
+            to_healthy, to_redirect = measure_first_request(env)
+            healthy.append(to_healthy)
+            first_redirect.append(to_redirect)
+        results[mode] = {
+            "runs": args.runs,
+            "import_ms": round(statistics.median(imports) * 1000, 1),
+            "time_to_health_check_ms": round(statistics.median(healthy) * 1000, 1),
+            "time_to_first_redirect_ms": round(statistics.median(first_redirect) * 1000, 1),
+        }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Micro-benchmark: per-pattern re.search loop vs UnsafePatternMatcher.
+
+Usage:
+    python -m benchmarks.unsafe_patterns [--rules N] [--iterations N]
+
+Checks that both matchers report the same rule for every sample URL,
+then times them on the built-in ruleset and on a synthetic ruleset
+grown with N extra extension rules.
+"""
+import argparse
+import random
+import re
+import string
+import timeit
+
+from app.link_validator import LinkValidator, UnsafePatternMatcher
+
+SAMPLE_URLS = [
+    "https://example.com/",
+    "https://example.com/index.html",
+    "https://example.com/downloads/setup.exe",
+    "https://example.com/archive.tar.gz",
+    "https://example.com/report.PDF",
+    "https://example.com/config.yml",
+    "https://example.com/site.env.production",
+    "https://my.environment.example.com/path",
+    "https://example.com/a.benv",
+    "http://10.0.0.1.127.0.0.1",
+    "https://example.com/backup.BAK",
+    "https://example.com/users/42/profile",
+    "https://shop.example.com/item?id=7&ref=mail",
+    "https://example.com/app",
+    "https://example.com/download.app\n",
+]
+
+
+def legacy_match(patterns, url):
+    for pattern in patterns:
+        if re.search(pattern, url, re.IGNORECASE):
+            return pattern
+    return None
+
+
+def synthetic_patterns(count, seed=0):
+    rng = random.Random(seed)
+    patterns = []
+    for _ in range(count // 5):
+        exts = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 8))) for _ in range(5)]
+        patterns.append(r"\.(" + "|".join(exts) + r")$")
+    return patterns
+
+
+def run(patterns, iterations, label):
+    matcher = UnsafePatternMatcher(patterns)
+    for url in SAMPLE_URLS:
+        expected = legacy_match(patterns, url)
+        actual = matcher.match(url)
+        assert expected == actual, f"{url!r}: legacy={expected!r} matcher={actual!r}"
+
+    legacy = timeit.timeit(lambda: [legacy_match(patterns, u) for u in SAMPLE_URLS], number=iterations)
+    compiled = timeit.timeit(lambda: [matcher.match(u) for u in SAMPLE_URLS], number=iterations)
+    per_call = 1e6 / (iterations * len(SAMPLE_URLS))
+    print(
+        f"{label:<28} rules={len(patterns):>6}  "
+        f"legacy={legacy * per_call:9.2f}us/url  matcher={compiled * per_call:7.2f}us/url  "
+        f"speedup={legacy / compiled:6.1f}x"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rules", type=int, default=5000, help="extra synthetic rules")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    builtin = list(LinkValidator.UNSAFE_PATTERNS)
+    run(builtin, args.iterations, "built-in")
+    run(builtin + synthetic_patterns(args.rules), max(1, args.iterations // 20), "built-in + synthetic")
+
+
+if __name__ == "__main__":
+    main()
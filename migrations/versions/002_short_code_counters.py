@@ -0,0 +1,28 @@
+"""short code counters
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Block leases for the sequence-based short code allocator
+    op.create_table(
+        'short_code_counters',
+        sa.Column('name', sa.String(length=50), primary_key=True),
+        sa.Column('value', sa.BigInteger(), nullable=False, server_default='0')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('short_code_counters')
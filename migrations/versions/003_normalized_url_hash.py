@@ -0,0 +1,67 @@
+"""normalized url and url hash
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.normalization import url_fingerprint
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 10000
+
+
+def upgrade() -> None:
+    op.add_column('links', sa.Column('normalized_url', sa.Text(), nullable=True))
+    op.add_column('links', sa.Column('url_hash', sa.BigInteger(), nullable=True))
+
+    links = sa.table(
+        'links',
+        sa.column('id', sa.String),
+        sa.column('original_url', sa.Text),
+        sa.column('normalized_url', sa.Text),
+        sa.column('url_hash', sa.BigInteger)
+    )
+    update = (
+        links.update()
+        .where(links.c.id == sa.bindparam('b_id'))
+        .values(normalized_url=sa.bindparam('b_normalized_url'), url_hash=sa.bindparam('b_url_hash'))
+    )
+
+    # Backfill in keyset-ordered batches, committing each one so a large
+    # table is not rewritten in a single transaction
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last_id = ''
+        while True:
+            rows = bind.execute(
+                sa.select(links.c.id, links.c.original_url)
+                .where(links.c.id > last_id)
+                .order_by(links.c.id)
+                .limit(BACKFILL_BATCH_SIZE)
+            ).fetchall()
+            if not rows:
+                break
+
+            params = []
+            for row in rows:
+                normalized_url, digest = url_fingerprint(row.original_url)
+                params.append({'b_id': row.id, 'b_normalized_url': normalized_url, 'b_url_hash': digest})
+            bind.execute(update, params)
+            last_id = rows[-1].id
+
+        op.create_index('ix_links_url_hash', 'links', ['url_hash'], postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_links_url_hash', table_name='links')
+    op.drop_column('links', 'url_hash')
+    op.drop_column('links', 'normalized_url')
@@ -0,0 +1,42 @@
+"""click events and rollups
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'click_events',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), primary_key=True, autoincrement=True),
+        sa.Column('short_code', sa.String(length=50), nullable=False),
+        sa.Column('occurred_at', sa.DateTime(), nullable=False),
+        sa.Column('referrer_host', sa.String(length=255), nullable=True),
+        sa.Column('ua_family', sa.String(length=32), nullable=True),
+        sa.Column('country', sa.String(length=2), nullable=True)
+    )
+    op.create_index('ix_click_events_short_code_occurred_at', 'click_events', ['short_code', 'occurred_at'])
+
+    op.create_table(
+        'click_rollups',
+        sa.Column('short_code', sa.String(length=50), primary_key=True),
+        sa.Column('granularity', sa.String(length=8), primary_key=True),
+        sa.Column('bucket_start', sa.DateTime(), primary_key=True),
+        sa.Column('clicks', sa.BigInteger(), nullable=False, server_default='0')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('click_rollups')
+    op.drop_index('ix_click_events_short_code_occurred_at', table_name='click_events')
+    op.drop_table('click_events')
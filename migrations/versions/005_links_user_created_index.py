@@ -0,0 +1,28 @@
+"""links (user_id, created_at, id) index
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_links_user_created_id',
+            'links',
+            ['user_id', 'created_at', 'id'],
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_links_user_created_id', table_name='links')
@@ -0,0 +1,44 @@
+"""expires_at index and archived links
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'archived_links',
+        sa.Column('id', sa.String(length=36), primary_key=True),
+        sa.Column('short_code', sa.String(length=10), nullable=False),
+        sa.Column('custom_alias', sa.String(length=50), nullable=True),
+        sa.Column('original_url', sa.Text(), nullable=False),
+        sa.Column('normalized_url', sa.Text(), nullable=True),
+        sa.Column('url_hash', sa.BigInteger(), nullable=True),
+        sa.Column('user_id', sa.String(length=36), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('click_count', sa.Integer(), nullable=True),
+        sa.Column('last_accessed', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+        sa.Column('preview', sa.JSON(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=False)
+    )
+    op.create_index('ix_archived_links_short_code', 'archived_links', ['short_code'])
+
+    with op.get_context().autocommit_block():
+        op.create_index('ix_links_expires_at', 'links', ['expires_at'], postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_links_expires_at', table_name='links')
+    op.drop_index('ix_archived_links_short_code', table_name='archived_links')
+    op.drop_table('archived_links')
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import uuid
+
+# Settings are read at import, so the environment has to be in place before the app is imported
+_tmpdir = tempfile.mkdtemp(prefix="shortener-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{_tmpdir}/test.db",
+    REDIS_CACHE_ENABLED="false",
+    CACHE_WARMUP_ENABLED="false",
+    SWEEPER_ENABLED="false",
+    BCRYPT_ROUNDS="4",
+    RATE_LIMIT_ENABLED="false",
+)
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import Base, SessionLocal, get_engine
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    Base.metadata.create_all(bind=get_engine())
+    yield
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def auth_headers(client):
+    username = f"user-{uuid.uuid4().hex[:8]}"
+    client.post("/auth/register", json={"username": username, "email": f"{username}@example.com", "password": "secret"})
+    token = client.post("/auth/login/json", json={"username": username, "password": "secret"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+class FakeRedis:
+    """In-memory stand-in for the redis.Redis calls LinkCache makes; its scripts redo the Lua in Python."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def register_script(self, script):
+        from app import cache
+
+        return {
+            cache._INVALIDATE_SCRIPT: self._invalidate,
+            cache._SET_IF_NOT_INVALIDATED_SCRIPT: self._set_if_not_invalidated,
+        }[script]
+
+    def _invalidate(self, keys, args):
+        epoch = int(self.data.get(keys[0], 0)) + 1
+        self.data[keys[0]] = str(epoch)
+        for key in keys[1:]:
+            self.data.pop(key, None)
+            self.data[key + ":invalidated"] = str(epoch)
+        return epoch
+
+    def _set_if_not_invalidated(self, keys, args):
+        since, values = int(args[0]), args[2:]
+        written = 0
+        for key, value in zip(keys, values):
+            if int(self.data.get(key + ":invalidated", 0)) <= since:
+                self.data[key] = value
+                written += 1
+        return written
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
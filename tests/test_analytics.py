@@ -0,0 +1,46 @@
+import pytest
+
+from app.analytics import ClickEventLog, CountryResolver
+
+
+class FlakyLog(ClickEventLog):
+    """Event log whose writes fail while `failing` is set and are recorded otherwise."""
+
+    def __init__(self, max_buffer):
+        super().__init__(interval=60, batch_size=2, max_buffer=max_buffer, countries=CountryResolver(None))
+        self.failing = False
+        self.written = []
+
+    def _write(self, batch):
+        if self.failing:
+            raise ConnectionError("database down")
+        self.written.extend(event[1] for event in batch)
+
+
+def test_overflow_drops_the_oldest_events_and_counts_them():
+    log = FlakyLog(max_buffer=3)
+    for code in "abcde":
+        log.record(code, None, None, None)
+
+    assert log.dropped == 2
+    log.drain()
+    assert log.written == ["c", "d", "e"]
+
+
+def test_failed_batch_is_retried_without_displacing_newer_events():
+    log = FlakyLog(max_buffer=3)
+    for code in "abc":
+        log.record(code, None, None, None)
+
+    log.failing = True
+    with pytest.raises(ConnectionError):
+        log.drain()
+    # The failed batch is held aside, so the buffer has room for new events again
+    for code in "de":
+        log.record(code, None, None, None)
+    assert log.pending() == 5
+    assert log.dropped == 0
+
+    log.failing = False
+    assert log.drain() == 5
+    assert log.written == ["a", "b", "c", "d", "e"]
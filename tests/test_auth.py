@@ -0,0 +1,37 @@
+import asyncio
+import uuid
+
+from app import services
+from app.hashing import password_hasher
+
+
+def register(client):
+    username = f"user-{uuid.uuid4().hex[:8]}"
+    client.post("/auth/register", json={"username": username, "email": f"{username}@example.com", "password": "secret"})
+    return username
+
+
+def test_user_lookup_runs_off_the_event_loop(monkeypatch, client):
+    username = register(client)
+    on_event_loop = []
+    find_user = services.AuthService._find_user
+
+    def recording_find_user(db, name):
+        try:
+            asyncio.get_running_loop()
+            on_event_loop.append(True)
+        except RuntimeError:
+            on_event_loop.append(False)
+        return find_user(db, name)
+
+    monkeypatch.setattr(services.AuthService, "_find_user", staticmethod(recording_find_user))
+    response = client.post("/auth/login/json", json={"username": username, "password": "secret"})
+
+    assert response.status_code == 200
+    assert on_event_loop == [False]
+
+
+def test_hash_queue_depth_is_exported(monkeypatch, client):
+    monkeypatch.setattr(password_hasher, "_pending", 7)
+    body = client.get("/metrics").text
+    assert "password_hash_queue_depth 7.0" in body
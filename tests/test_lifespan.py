@@ -0,0 +1,22 @@
+from fastapi.testclient import TestClient
+
+from app import main
+from app.clicks import click_buffer
+
+
+def test_failed_click_flush_does_not_skip_the_rest_of_shutdown(monkeypatch, caplog):
+    stop = click_buffer.stop
+    disposed = []
+
+    def stop_then_fail():
+        stop()
+        raise ConnectionError("database is down")
+
+    monkeypatch.setattr(click_buffer, "stop", stop_then_fail)
+    monkeypatch.setattr(main, "dispose_engine", lambda: disposed.append(True))
+
+    with TestClient(main.app):
+        pass
+
+    assert disposed == [True]
+    assert "click count flush" in caplog.text
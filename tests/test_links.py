@@ -0,0 +1,107 @@
+import itertools
+import json
+import uuid
+
+from app import services
+from app.config import settings
+
+
+def unique_alias(length=7):
+    return ("a" + uuid.uuid4().hex)[:length]
+
+
+def test_custom_alias_in_generated_format_is_accepted(client, auth_headers):
+    alias = unique_alias()
+    response = client.post(
+        "/links/shorten", json={"original_url": "https://example.com/a.html", "custom_alias": alias}, headers=auth_headers
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["short_code"] == alias
+
+
+class SequenceStub:
+    """Allocator that hands out a fixed sequence of codes."""
+
+    guarantees_unique = True
+
+    def __init__(self, codes):
+        self.codes = iter(codes)
+
+    def allocate(self):
+        return next(self.codes)
+
+    def allocate_many(self, count):
+        return list(itertools.islice(self.codes, count))
+
+
+def test_generated_code_taken_by_an_alias_is_skipped(monkeypatch, client, auth_headers):
+    alias, fresh = unique_alias(), unique_alias()
+    client.post("/links/shorten", json={"original_url": "https://example.com/b.html", "custom_alias": alias}, headers=auth_headers)
+    allocator = SequenceStub([alias, fresh])
+    monkeypatch.setattr(services, "get_allocator", lambda: allocator)
+
+    response = client.post("/links/shorten", json={"original_url": "https://example.com/c.html"}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["short_code"] == fresh
+
+
+def test_bulk_retries_codes_taken_by_an_alias(monkeypatch, client, auth_headers):
+    alias, fresh = unique_alias(), unique_alias()
+    client.post("/links/shorten", json={"original_url": "https://example.com/d.html", "custom_alias": alias}, headers=auth_headers)
+    allocator = SequenceStub([alias, fresh])
+    monkeypatch.setattr(services, "get_allocator", lambda: allocator)
+
+    response = client.post("/links/bulk", json=[{"original_url": "https://example.com/e.html"}], headers=auth_headers)
+    assert response.status_code == 200, response.text
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [result.get("short_code") for result in results] == [fresh]
+
+
+def test_stats_accept_timezone_aware_ranges(client, auth_headers):
+    code = client.post("/links/shorten", json={"original_url": "https://example.com/f.html"}, headers=auth_headers).json()["short_code"]
+
+    response = client.get(
+        f"/links/{code}/stats",
+        params={"granularity": "hour", "since": "2026-10-17T00:00:00+02:00", "until": "2026-10-17T06:00:00Z"},
+        headers=auth_headers
+    )
+    assert response.status_code == 200, response.text
+    buckets = [bucket["bucket_start"] for bucket in response.json()["timeseries"]]
+    # +02:00 midnight is 22:00 UTC the day before
+    assert buckets[0] == "2026-10-16T22:00:00"
+    assert len(buckets) == 8
+
+
+def test_search_with_an_unparseable_url_is_not_found(client):
+    response = client.get("/links/search", params={"original_url": "http://[abc"})
+    assert response.status_code == 404, response.text
+
+
+def test_bulk_body_over_the_limit_is_refused(monkeypatch, client, auth_headers):
+    monkeypatch.setattr(settings, "BULK_MAX_BODY_BYTES", 100)
+    items = [{"original_url": f"https://example.com/{i}.html"} for i in range(10)]
+
+    response = client.post("/links/bulk", json=items, headers=auth_headers)
+    assert response.status_code == 413
+
+    # Without a Content-Length the body is counted as it arrives
+    lines = (json.dumps(item).encode() + b"\n" for item in items)
+    response = client.post(
+        "/links/bulk", content=lines, headers={**auth_headers, "Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 413
+
+
+def test_bulk_honours_reuse_existing(client, auth_headers):
+    url = f"https://example.com/{uuid.uuid4().hex}.html"
+    code = client.post("/links/shorten", json={"original_url": url}, headers=auth_headers).json()["short_code"]
+
+    response = client.post(
+        "/links/bulk",
+        json=[{"original_url": url, "reuse_existing": True}, {"original_url": url}],
+        headers=auth_headers
+    )
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [result["index"] for result in results] == [0, 1]
+    assert results[0]["short_code"] == code
+    assert results[1]["short_code"] != code
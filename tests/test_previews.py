@@ -0,0 +1,105 @@
+import time
+import uuid
+
+import pytest
+
+from app.link_validator import LinkValidator
+from app.models import Link
+from app.previews import PREVIEW_PENDING, PreviewWorker
+
+
+def unreachable(url):
+    raise ConnectionError("not under test")
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    # Pending previews left by other tests are re-queued on start; fail them fast and before this test's link exists
+    monkeypatch.setattr(LinkValidator, "fetch_preview", staticmethod(unreachable))
+    worker = PreviewWorker(concurrency=1, max_attempts=3, backoff=0.01)
+    worker.start()
+    worker._resumer.join()
+    yield worker
+    worker.stop()
+
+
+@pytest.fixture
+def link(db):
+    # A unique URL, so the stubs can tell this link from pending ones the worker re-queues on start
+    code = uuid.uuid4().hex[:10]
+    link = Link(short_code=code, original_url=f"https://example.com/{code}", preview=dict(PREVIEW_PENDING))
+    db.add(link)
+    db.commit()
+    return link
+
+
+def wait_for_preview(db, link, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        db.expire_all()
+        preview = db.get(Link, link.id).preview
+        if preview["status"] != "pending":
+            return preview
+        time.sleep(0.01)
+    raise AssertionError("preview was never stored")
+
+
+def test_failed_fetch_is_retried_until_it_succeeds(monkeypatch, worker, db, link):
+    calls = []
+
+    def fetch_preview(url):
+        if url != link.original_url:
+            return unreachable(url)
+        calls.append(time.monotonic())
+        if len(calls) < 3:
+            raise ConnectionError("temporarily unreachable")
+        return {"title": "Example", "description": "", "image": ""}
+
+    monkeypatch.setattr(LinkValidator, "fetch_preview", staticmethod(fetch_preview))
+    worker.submit(link.id, link.original_url)
+
+    preview = wait_for_preview(db, link)
+    assert preview["status"] == "ready"
+    assert preview["title"] == "Example"
+    assert len(calls) == 3
+    # Exponential backoff: the second retry waits twice as long as the first
+    assert calls[2] - calls[1] >= 0.02
+    assert calls[1] - calls[0] >= 0.01
+
+
+def test_preview_is_marked_failed_after_the_last_attempt(monkeypatch, worker, db, link):
+    calls = []
+
+    def fetch_preview(url):
+        if url == link.original_url:
+            calls.append(url)
+        raise ConnectionError("unreachable")
+
+    monkeypatch.setattr(LinkValidator, "fetch_preview", staticmethod(fetch_preview))
+    worker.submit(link.id, link.original_url)
+
+    assert wait_for_preview(db, link)["status"] == "failed"
+    assert len(calls) == 3
+
+
+def test_result_is_dropped_when_the_link_target_changed(monkeypatch, db, link):
+    old_url = link.original_url
+    monkeypatch.setattr(LinkValidator, "fetch_preview", staticmethod(lambda url: {"title": "Old"}))
+    db.query(Link).filter(Link.id == link.id).update({Link.original_url: "https://example.org/new"})
+    db.commit()
+
+    PreviewWorker(concurrency=1, max_attempts=1, backoff=0).process(link.id, old_url)
+
+    db.expire_all()
+    assert db.get(Link, link.id).preview == PREVIEW_PENDING
+
+
+def test_previews_left_pending_are_resumed_on_start(monkeypatch, db, link):
+    monkeypatch.setattr(LinkValidator, "fetch_preview", staticmethod(lambda url: {"title": "Resumed"}))
+    worker = PreviewWorker(concurrency=1, max_attempts=1, backoff=0)
+    worker.start()
+    try:
+        # Nothing was submitted: the link was left pending by a previous run
+        assert wait_for_preview(db, link)["title"] == "Resumed"
+    finally:
+        worker.stop()
@@ -0,0 +1,76 @@
+import time
+import uuid
+
+import pytest
+
+from app.ratelimit import MemoryLimiter, RateLimiter, retry_after
+from app.routers import auth
+
+SHORTEN_IP = ("shorten:ip", 3, 60)
+
+
+def test_sliding_window_blocks_over_the_limit():
+    limiter = MemoryLimiter()
+    now = 1000 * 60.0
+    assert [limiter.hit([(SHORTEN_IP, "10.0.0.1")], now) for _ in range(3)] == [0, 0, 0]
+    assert limiter.hit([(SHORTEN_IP, "10.0.0.1")], now) > 0
+    # Other clients have their own counters
+    assert limiter.hit([(SHORTEN_IP, "10.0.0.2")], now) == 0
+
+
+def test_retry_after_is_when_the_next_hit_fits():
+    wait = retry_after(previous=3, current=0, limit=3, window=60, elapsed=0.0)
+    assert wait == pytest.approx(20.0)
+    assert retry_after(previous=3, current=0, limit=3, window=60, elapsed=wait) == 0
+
+
+def test_many_live_keys_keep_checks_cheap_and_memory_bounded():
+    limiter = MemoryLimiter(max_keys=10000)
+    now = 1000 * 60.0
+    started = time.perf_counter()
+    for i in range(30000):
+        limiter.hit([(SHORTEN_IP, f"ip-{i}")], now)
+    elapsed = time.perf_counter() - started
+
+    assert len(limiter._counters) == 10000
+    # Rebuilding the map on every hit past max_keys took about 1ms per hit at this size
+    assert elapsed < 1.0
+
+
+def test_recently_used_keys_survive_eviction():
+    limiter = MemoryLimiter(max_keys=100)
+    now = 1000 * 60.0
+    for _ in range(3):
+        limiter.hit([(SHORTEN_IP, "attacker")], now)
+    for i in range(200):
+        limiter.hit([(SHORTEN_IP, "attacker")], now)
+        limiter.hit([(SHORTEN_IP, f"ip-{i}")], now)
+    assert limiter.hit([(SHORTEN_IP, "attacker")], now) > 0
+
+
+def test_check_without_counting():
+    limiter = MemoryLimiter()
+    now = 1000 * 60.0
+    for _ in range(5):
+        assert limiter.hit([(SHORTEN_IP, "10.0.0.1")], now, count=False) == 0
+    assert [limiter.hit([(SHORTEN_IP, "10.0.0.1")], now) for _ in range(3)] == [0, 0, 0]
+
+
+@pytest.fixture
+def login_limiter(monkeypatch):
+    limiter = RateLimiter(True, "memory", {"login:username": ("login:username", 2, 300)}, trust_forwarded_for=False)
+    monkeypatch.setattr(auth, "rate_limiter", limiter)
+    return limiter
+
+
+def test_only_failed_logins_count_against_the_username(client, login_limiter):
+    username = f"user-{uuid.uuid4().hex[:8]}"
+    client.post("/auth/register", json={"username": username, "email": f"{username}@example.com", "password": "secret"})
+
+    def login(password):
+        return client.post("/auth/login/json", json={"username": username, "password": password}).status_code
+
+    assert [login("secret") for _ in range(5)] == [200] * 5
+    assert [login("wrong") for _ in range(2)] == [401, 401]
+    # The limit is reached, so even the right password is turned away before bcrypt runs
+    assert login("secret") == 429
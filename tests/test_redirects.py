@@ -0,0 +1,78 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import redirects
+from app.cache import LinkCache, LocalCache
+from app.models import Link
+from app.ratelimit import rate_limiter
+from app.redirects import RedirectService
+
+
+def shorten(client, headers, **fields):
+    body = {"original_url": "https://example.com/target.html", **fields}
+    return client.post("/links/shorten", json=body, headers=headers).json()["short_code"]
+
+
+def test_redirect_is_cacheable_and_varies_on_accept(client, auth_headers):
+    code = shorten(client, auth_headers)
+    response = client.get(f"/{code}", follow_redirects=False)
+
+    assert response.status_code == 307
+    assert response.headers["location"] == "https://example.com/target.html"
+    assert response.headers["cache-control"] == "public, max-age=60"
+    assert response.headers["vary"] == "Accept"
+
+
+def test_json_variant_is_not_stored_and_varies_on_accept(client, auth_headers):
+    code = shorten(client, auth_headers)
+    response = client.get(f"/{code}", headers={"Accept": "application/json"})
+
+    assert response.status_code == 200
+    assert response.json() == {"original_url": "https://example.com/target.html", "short_code": code}
+    assert response.headers["cache-control"] == "no-store"
+    assert response.headers["vary"] == "Accept"
+
+
+def test_redirect_is_not_cached_past_the_link_expiry(client, auth_headers):
+    expires_at = (datetime.utcnow() + timedelta(seconds=30)).isoformat()
+    code = shorten(client, auth_headers, expires_at=expires_at)
+    response = client.get(f"/{code}", follow_redirects=False)
+
+    max_age = int(response.headers["cache-control"].rsplit("=", 1)[1])
+    assert 0 < max_age <= 30
+    assert "expires" in response.headers
+
+
+def test_link_updated_during_a_load_is_not_cached(monkeypatch, db, fake_redis):
+    code = uuid.uuid4().hex[:10]
+    db.add(Link(short_code=code, original_url="https://example.com/old"))
+    db.commit()
+    cache = LinkCache(LocalCache(100, 10), fake_redis)
+    monkeypatch.setattr(redirects, "link_cache", cache)
+    fetch = RedirectService._fetch_link
+
+    def fetch_then_update(session, short_code):
+        row = fetch(session, short_code)
+        # The update commits and invalidates after the old row was read but before it is stored
+        cache.invalidate(short_code)
+        return row
+
+    monkeypatch.setattr(RedirectService, "_fetch_link", staticmethod(fetch_then_update))
+
+    assert RedirectService._load_link(db, code).original_url == "https://example.com/old"
+    assert cache.local.get(code) is None
+    assert LinkCache.KEY_PREFIX + code not in fake_redis.data
+
+
+@pytest.mark.parametrize("trusted, expected", [(False, None), (True, "203.0.113.7")])
+def test_click_ip_ignores_forwarded_for_unless_trusted(monkeypatch, client, auth_headers, trusted, expected):
+    code = shorten(client, auth_headers)
+    recorded = []
+    monkeypatch.setattr(rate_limiter, "trust_forwarded_for", trusted)
+    monkeypatch.setattr(RedirectService, "record_click", lambda *args: recorded.append(args[3]))
+
+    client.get(f"/{code}", headers={"X-Forwarded-For": "203.0.113.7, 10.0.0.1"}, follow_redirects=False)
+    # TestClient requests have no peer address, so an untrusted header leaves the IP unknown
+    assert recorded == [expected]
@@ -0,0 +1,68 @@
+import tempfile
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app import database
+from app.cache import link_cache
+from app.consistency import read_your_writes
+from app.database import Base, ReplicaSet
+from app.models import Link
+
+JSON = {"Accept": "application/json"}
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    """A lagging replica: a second SQLite database that the test fills by hand."""
+    replicas = ReplicaSet([f"sqlite:///{tempfile.mkdtemp()}/replica.db"], interval=60)
+    engine = replicas.engine("replica-0")
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(database, "replicas", replicas)
+    monkeypatch.setattr(read_your_writes, "enabled", True)
+    yield engine
+    read_your_writes.local.clear()
+    database._engines.pop("replica-0").dispose()
+    database.pool_monitors.pop("replica-0", None)
+
+
+def replicate(engine, code, url):
+    with Session(engine) as session:
+        session.merge(Link(id=code, short_code=code, original_url=url))
+        session.commit()
+
+
+def forget_writes():
+    """Let the stickiness window and the redirect cache lapse."""
+    read_your_writes.local.clear()
+    link_cache.local.clear()
+
+
+def test_reads_after_a_write_go_to_the_primary(client, auth_headers, replica):
+    code = client.post("/links/shorten", json={"original_url": "https://example.com/v1"}, headers=auth_headers).json()["short_code"]
+    replicate(replica, code, "https://example.com/v1")
+    client.put(f"/links/{code}", json={"original_url": "https://example.com/v2"}, headers=auth_headers)
+
+    # The replica still has v1, but the write made the code and the user sticky
+    assert client.get(f"/{code}", headers=JSON).json()["original_url"] == "https://example.com/v2"
+    assert client.get(f"/links/{code}/stats", headers=auth_headers).json()["original_url"] == "https://example.com/v2"
+
+    forget_writes()
+    assert client.get(f"/{code}", headers=JSON).json()["original_url"] == "https://example.com/v1"
+    assert client.get(f"/links/{code}/stats", headers=auth_headers).json()["original_url"] == "https://example.com/v1"
+
+
+def test_code_missing_on_the_replica_is_read_from_the_primary(client, auth_headers, replica):
+    code = client.post("/links/shorten", json={"original_url": "https://example.com/new"}, headers=auth_headers).json()["short_code"]
+    forget_writes()
+
+    assert client.get(f"/{code}", headers=JSON).json()["original_url"] == "https://example.com/new"
+
+
+def test_unhealthy_replica_falls_back_to_the_primary(client, auth_headers, replica):
+    code = client.post("/links/shorten", json={"original_url": "https://example.com/primary"}, headers=auth_headers).json()["short_code"]
+    replicate(replica, code, "https://example.com/replica")
+    forget_writes()
+
+    database.replicas.eject("replica-0", "test")
+    assert client.get(f"/{code}", headers=JSON).json()["original_url"] == "https://example.com/primary"
@@ -0,0 +1,132 @@
+import sqlite3
+import time
+import uuid
+
+import pytest
+
+from app.clicks import ClickBuffer
+from app.database import get_engine
+from app.models import Link
+from app.resilience import CircuitBreaker, database_breaker
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_breaker_without_probe_lets_one_trial_through_per_period():
+    breaker = CircuitBreaker("test", 2, reset_timeout=0.05, errors=(ConnectionError,))
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.is_open and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert not breaker.is_open
+
+
+def test_breaker_with_probe_never_hands_trials_to_callers():
+    probes = []
+    breaker = CircuitBreaker("test", 2, reset_timeout=0.05, errors=(ConnectionError,), probe=lambda: probes.append(1))
+    breaker.record_failure()
+    breaker.record_failure()
+
+    # Callers that are turned away cannot use up the trial, so the probe alone closes the breaker
+    assert not breaker.allow()
+    assert wait_until(lambda: not breaker.is_open, timeout=1.0)
+    assert probes == [1]
+
+
+def test_failed_probes_keep_the_breaker_open():
+    def probe():
+        raise ConnectionError("still down")
+
+    breaker = CircuitBreaker("test", 1, reset_timeout=0.02, errors=(ConnectionError,), probe=probe)
+    breaker.record_failure()
+    time.sleep(0.1)
+    assert breaker.is_open
+    assert breaker.failures > 1
+
+    breaker.probe = lambda: None
+    assert wait_until(lambda: not breaker.is_open, timeout=1.0)
+
+
+@pytest.fixture
+def fast_reset(monkeypatch):
+    monkeypatch.setattr(database_breaker, "reset_timeout", 0.2)
+    yield
+    database_breaker.record_success()
+
+
+class Outage:
+    """Makes new connections to the primary fail between begin() and end()."""
+
+    def __init__(self, monkeypatch):
+        self.monkeypatch = monkeypatch
+        self.engine = get_engine()
+        self.connect = self.engine.dialect.connect
+
+    @staticmethod
+    def refuse(*args, **kwargs):
+        raise sqlite3.OperationalError("unable to open database file")
+
+    def begin(self):
+        self.engine.pool.dispose()
+        self.monkeypatch.setattr(self.engine.dialect, "connect", self.refuse)
+
+    def end(self):
+        self.monkeypatch.setattr(self.engine.dialect, "connect", self.connect)
+
+
+@pytest.fixture
+def outage(monkeypatch):
+    return Outage(monkeypatch)
+
+
+def test_idle_service_recovers_while_flushers_tick(fast_reset, client, auth_headers):
+    for _ in range(database_breaker.failure_threshold):
+        database_breaker.record_failure()
+    assert client.get("/links", headers=auth_headers).status_code == 503
+
+    buffer = ClickBuffer(interval=0.02, max_pending=1000)
+    buffer.start()
+    try:
+        # The database is healthy, nothing is pending and no requests arrive: only the probe can close it
+        assert wait_until(lambda: not database_breaker.is_open, timeout=2.0)
+    finally:
+        buffer.stop()
+    assert client.get("/links", headers=auth_headers).status_code == 200
+
+
+def test_clicks_buffered_during_an_outage_are_replayed(fast_reset, client, auth_headers, db, outage):
+    code = uuid.uuid4().hex[:10]
+    db.add(Link(short_code=code, original_url="https://example.com/outage", click_count=0))
+    db.commit()
+
+    outage.begin()
+    buffer = ClickBuffer(interval=0.02, max_pending=1000)
+    buffer.start()
+    try:
+        for _ in range(25):
+            buffer.record(code)
+        assert wait_until(lambda: database_breaker.is_open)
+        assert client.get("/links", headers=auth_headers).status_code == 503
+        assert client.get("/health").json()["status"] == "degraded"
+        assert buffer.pending() == 25
+
+        outage.end()
+        assert wait_until(lambda: not database_breaker.is_open)
+        assert wait_until(lambda: buffer.pending() == 0)
+    finally:
+        buffer.stop()
+
+    db.expire_all()
+    assert db.query(Link.click_count).filter(Link.short_code == code).scalar() == 25
+    assert client.get("/health").json()["status"] == "ok"
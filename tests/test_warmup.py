@@ -0,0 +1,80 @@
+import time
+import uuid
+
+import pytest
+
+from app.cache import CachedLink, LinkCache, LocalCache, settings
+from app.models import Link
+from app.warmup import CacheWarmer
+
+
+class StubRedis:
+    """Just enough of redis.Redis for LinkCache: GET plus registered scripts that record their calls."""
+
+    def __init__(self, epoch=0):
+        self.epoch = epoch
+        self.calls = []
+
+    def get(self, key):
+        return str(self.epoch)
+
+    def register_script(self, script):
+        def run(keys, args):
+            self.calls.append((script, keys, args))
+            return 0
+        return run
+
+
+@pytest.fixture
+def cache():
+    return LinkCache(LocalCache(100, 10))
+
+
+def test_warmed_links_invalidated_by_another_worker_expire_locally(monkeypatch, db, fake_redis):
+    code = uuid.uuid4().hex[:10]
+    db.add(Link(short_code=code, original_url="https://example.com/hot", click_count=10 ** 9))
+    db.commit()
+    worker, other_worker = LinkCache(LocalCache(100, 10), fake_redis), LinkCache(LocalCache(100, 10), fake_redis)
+    monkeypatch.setattr("app.warmup.link_cache", worker)
+    monkeypatch.setattr(settings, "LINK_CACHE_LOCAL_TTL_SECONDS", 0.05)
+
+    assert CacheWarmer("clicks", 1, 10, 24, interval=300).warm() == 1
+    # Redis holds the warmed link for the other workers
+    assert other_worker.get(code).original_url == "https://example.com/hot"
+
+    other_worker.invalidate(code)
+    # The invalidation never reaches this worker's local tier, so only the short local TTL bounds it
+    time.sleep(0.1)
+    assert worker.get(code) is None
+
+
+def test_links_invalidated_during_a_pass_are_not_recached(cache):
+    since = cache.epoch()
+    cache.invalidate("changed")
+
+    stored = cache.set_many(
+        [("changed", CachedLink("https://old.example.com", None)), ("other", CachedLink("https://example.com", None))],
+        since
+    )
+    assert stored == 1
+    assert cache.local.get("changed") is None
+    assert cache.local.get("other") is not None
+    # A pass that started after the invalidation caches it again
+    cache.set_many([("changed", CachedLink("https://new.example.com", None))], cache.epoch())
+    assert cache.local.get("changed").original_url == "https://new.example.com"
+
+
+def test_redis_write_is_conditional_on_the_epoch_read_before_the_pass():
+    client = StubRedis(epoch=41)
+    cache = LinkCache(LocalCache(100, 10), client)
+
+    since = cache.epoch()
+    cache.set_many([("code", CachedLink("https://example.com", None))], since)
+
+    (_, keys, args), = client.calls
+    assert keys == ["link:code"]
+    assert args[0] == 41
+
+    cache.invalidate("code")
+    (_, keys, _) = client.calls[-1]
+    assert keys == [LinkCache.EPOCH_KEY, "link:code"]